@@ -1,105 +1,26 @@
-import pandas as pd
+import argparse
+import shutil
+from dataclasses import dataclass, replace
+from pathlib import Path
+
 import numpy as np
-from datetime import datetime, timedelta
+import pandas as pd
+
+from physics import hydro_energy_from_volume, solar_energy_from_irradiance, wind_power
 
 # Constants for energy calculations
 SOLAR_PANEL_EFFICIENCY = 0.18
+SOLAR_PANEL_AREA = 1000  # m² (panel area)
 WIND_TURBINE_EFFICIENCY = 0.35
 WIND_TURBINE_AREA = 100  # m² (swept area of wind turbine)
-GRAVITY = 9.81  # m/s²
-WATER_DENSITY = 1000  # kg/m³
 HYDRO_TURBINE_EFFICIENCY = 0.8
 HEAD_HEIGHT = 50  # m (height difference for hydro energy)
 
-# Define factors and variations
-def time_of_day_factor(hour):
-    if 0 <= hour < 6:
-        return 0.5
-    elif 6 <= hour < 12:
-        return 0.8
-    elif 12 <= hour < 18:
-        return 1.2
-    elif 18 <= hour <= 23:
-        return 1.0
-
-def seasonal_factor(month):
-    if month in [12, 1, 2]:
-        return 1.1
-    elif month in [3, 4, 5]:
-        return 0.9
-    elif month in [6, 7, 8]:
-        return 1.3
-    elif month in [9, 10, 11]:
-        return 1.0
-
-def weather_variation():
-    return round(np.random.uniform(0.9, 1.1), 2)
-
-# Function to calculate energy generation
-def calculate_solar_energy(irradiance, is_sunny):
-    return round(irradiance * SOLAR_PANEL_EFFICIENCY * is_sunny * (15 / 60), 2)
-
-def calculate_wind_energy(wind_speed, air_density):
-    power = 0.5 * air_density * WIND_TURBINE_AREA * (wind_speed ** 3)
-    return round(power * WIND_TURBINE_EFFICIENCY * (15 / 60) / 1000, 2)  # kWh
-
-def calculate_hydro_energy(precipitation, runoff_coefficient):
-    runoff_volume = precipitation * runoff_coefficient  # Simplified runoff volume
-    energy = runoff_volume * WATER_DENSITY * GRAVITY * HEAD_HEIGHT * HYDRO_TURBINE_EFFICIENCY
-    return round(energy / (3.6e6), 2)  # Convert J to kWh
-
-# Function to generate weather data
-def generate_indian_weather_data(timestamp):
-    def cloud_cover():
-        return round(np.random.uniform(0, 100), 1)
-
-    def solar_irradiance(cloud_coverage):
-        base_irradiance = np.random.uniform(800, 1000)  # Max on clear days
-        reduction_factor = (100 - cloud_coverage) / 100
-        return round(base_irradiance * reduction_factor, 1)
-
-    def air_density(temperature):
-        base_density = 1.225  # kg/m³ at sea level
-        return round(base_density - 0.003 * (temperature - 15), 3)
-
-    def precipitation(month):
-        return round(np.random.uniform(0, 10), 1)  # Randomized precipitation
-
-    def runoff_coefficient(precipitation):
-        return round(0.05 + 0.005 * precipitation, 2)
-
-    month = timestamp.month
-    if month in [12, 1, 2]:  # Winter
-        temperature = round(np.random.uniform(10, 25), 1)
-    elif month in [3, 4, 5]:  # Spring
-        temperature = round(np.random.uniform(20, 35), 1)
-    elif month in [6, 7, 8]:  # Summer
-        temperature = round(np.random.uniform(25, 40), 1)
-    elif month in [9, 10, 11]:  # Autumn
-        temperature = round(np.random.uniform(15, 30), 1)
-
-    humidity = round(np.random.uniform(30, 70), 1)
-    wind_speed = round(np.random.uniform(1, 10), 1)
-    is_sunny = np.random.choice([1, 0], p=[0.5, 0.5])  # Equal probability
-    cloud_coverage = cloud_cover()
-    solar_irradiance_value = solar_irradiance(cloud_coverage)
-    air_density_value = air_density(temperature)
-    precipitation_value = precipitation(month)
-    runoff_value = runoff_coefficient(precipitation_value)
-
-    return temperature, humidity, wind_speed, is_sunny, cloud_coverage, solar_irradiance_value, air_density_value, precipitation_value, runoff_value
-
-# Generate data with solar, wind, and hydro energy
-data = []
-current_time = datetime(2020, 1, 1, 0, 0)
-end_date = datetime(2025, 12, 31, 23, 45)
-interval = timedelta(minutes=15)
-
-# Initialize cumulative energy variables
-cumulative_energy_consumed = 0
-cumulative_solar_energy = 0
-cumulative_wind_energy = 0
-cumulative_hydro_energy = 0
+# Date range and sampling interval of the generated dataset
+START_DATE = "2020-01-01 00:00"
+END_DATE = "2025-12-31 23:45"
+INTERVAL = "15min"
+INTERVAL_HOURS = 15 / 60
 
 # Define base energy consumption per interval
 interval_consumption = 5  # kWh (example value for 15-minute interval)
@@ -107,72 +28,222 @@ interval_consumption = 5  # kWh (example value for 15-minute interval)
 # Noise parameters
 noise_std_dev = 2 # Standard deviation of noise for daily totals initially was 0.1
 
-while current_time <= end_date:
-    (temperature, humidity, wind_speed, is_sunny, cloud_coverage, solar_irradiance_value,
-     air_density_value, precipitation_value, runoff_value) = generate_indian_weather_data(current_time)
-    
-    # Energy consumed
-    hour = current_time.hour
-    tod_factor = time_of_day_factor(hour)
-    season_factor = seasonal_factor(current_time.month)
-    weather_factor = weather_variation()
-    energy_consumed = round(interval_consumption * tod_factor * season_factor * weather_factor, 2)
-    
-    # Update cumulative energy consumed
-    cumulative_energy_consumed += energy_consumed
-    
-    # Energy generation
-    solar_energy = calculate_solar_energy(solar_irradiance_value, is_sunny)
-    wind_energy = calculate_wind_energy(wind_speed, air_density_value)
-    hydro_energy = calculate_hydro_energy(precipitation_value, runoff_value)
-    
-    # Update cumulative energy generation
-    cumulative_solar_energy += solar_energy
-    cumulative_wind_energy += wind_energy
-    cumulative_hydro_energy += hydro_energy
-    
-    # Add noise to daily totals
-    if current_time.hour == 23 and current_time.minute == 45:
-        # Add random noise to cumulative daily energy values
-        cumulative_energy_consumed += np.random.normal(0, noise_std_dev)
-        cumulative_solar_energy += np.random.normal(0, noise_std_dev)
-        cumulative_wind_energy += np.random.normal(0, noise_std_dev)
-        cumulative_hydro_energy += np.random.normal(0, noise_std_dev)
-    
-    # Append data
-    data.append([current_time,
-                 cumulative_energy_consumed,
-                 temperature,
-                 humidity,
-                 wind_speed,
-                 is_sunny,
-                 cloud_coverage,
-                 solar_irradiance_value,
-                 air_density_value,
-                 precipitation_value,
-                 runoff_value,
-                 round(cumulative_solar_energy, 2),
-                 round(cumulative_wind_energy, 2),
-                 round(cumulative_hydro_energy, 2)
-                 ])
-    
-    # Reset at the end of the day
-    if current_time.hour == 23 and current_time.minute == 45:
-        cumulative_energy_consumed = 0
-        cumulative_solar_energy = 0
-        cumulative_wind_energy = 0
-        cumulative_hydro_energy = 0
-    
-    current_time += interval
-
-# Create DataFrame
-columns = [
+COLUMNS = [
     "timestamp", "energy_consumed_kWh", "temperature_C", "humidity_%", "wind_speed_mps",
     "is_sunny", "cloud_cover_%", "solar_irradiance_Wm2", "air_density_kgm3",
     "precipitation_mm", "runoff_coefficient", "solar_energy_kWh",
     "wind_energy_kWh", "hydro_energy_kWh"
 ]
-df = pd.DataFrame(data, columns=columns)
 
-# Save to CSV
-df.to_csv("energy_data_with_noise.csv", index=False)
+# Lookup tables so the factors can be read for whole arrays of hours / months at once
+TIME_OF_DAY_FACTORS = np.array([0.5] * 6 + [0.8] * 6 + [1.2] * 6 + [1.0] * 6)  # index: hour 0-23
+SEASONAL_FACTORS = np.array([np.nan, 1.1, 1.1, 0.9, 0.9, 0.9, 1.3, 1.3, 1.3, 1.0, 1.0, 1.0, 1.1])  # index: month 1-12
+SEASON_MIN_TEMPERATURE = np.array([np.nan, 10, 10, 20, 20, 20, 25, 25, 25, 15, 15, 15, 10])  # index: month 1-12
+SEASON_TEMPERATURE_RANGE = 15  # °C between the coldest and warmest draw of a season
+
+
+# Equipment and climate of one generated site. The defaults are the constants above,
+# so a default site reproduces the original single-site dataset exactly.
+@dataclass(frozen=True)
+class SiteProfile:
+    solar_panel_efficiency: float = SOLAR_PANEL_EFFICIENCY
+    solar_panel_area: float = SOLAR_PANEL_AREA  # m²
+    wind_turbine_efficiency: float = WIND_TURBINE_EFFICIENCY
+    wind_turbine_area: float = WIND_TURBINE_AREA  # m²
+    hydro_turbine_efficiency: float = HYDRO_TURBINE_EFFICIENCY
+    head_height: float = HEAD_HEIGHT  # m
+    interval_consumption: float = interval_consumption  # kWh per interval before factors
+    season_min_temperature: tuple = tuple(SEASON_MIN_TEMPERATURE[1:].tolist())  # °C, January to December
+    temperature_range: float = SEASON_TEMPERATURE_RANGE  # °C
+    humidity: tuple = (30, 70)  # % (low, high)
+    wind_speed: tuple = (1, 10)  # m/s (low, high)
+    cloud_cover: tuple = (0, 100)  # % (low, high)
+    precipitation: tuple = (0, 10)  # mm (low, high)
+
+DEFAULT_SITE = SiteProfile()
+
+# Climate profiles: changes to the weather distributions of DEFAULT_SITE
+CLIMATES = {
+    "tropical": {},
+    "coastal": {"humidity": (60, 90), "wind_speed": (3, 14), "precipitation": (0, 15)},
+    "arid": {"season_min_temperature": tuple(t + 5 for t in DEFAULT_SITE.season_min_temperature),
+             "humidity": (10, 40), "cloud_cover": (0, 40), "precipitation": (0, 2)},
+    "highland": {"season_min_temperature": tuple(t - 8 for t in DEFAULT_SITE.season_min_temperature),
+                 "wind_speed": (2, 12), "precipitation": (0, 20)},
+}
+
+# Site from a climate profile plus equipment/climate overrides (SiteProfile fields)
+def site_profile(climate="tropical", **params):
+    if climate not in CLIMATES:
+        raise ValueError(f"Unknown climate profile: {climate}")
+    params = {name: tuple(value) if isinstance(value, list) else value for name, value in params.items()}
+    return replace(DEFAULT_SITE, **CLIMATES[climate], **params)
+
+# Define factors and variations (accept scalars or NumPy arrays)
+def time_of_day_factor(hour):
+    return TIME_OF_DAY_FACTORS[hour]
+
+def seasonal_factor(month):
+    return SEASONAL_FACTORS[month]
+
+def weather_variation(rng, size=None):
+    return np.round(rng.uniform(0.9, 1.1, size), 2)
+
+# Function to calculate energy generation per interval (formulas live in physics.py)
+def calculate_solar_energy(irradiance, is_sunny, site=DEFAULT_SITE):
+    energy = solar_energy_from_irradiance(irradiance * is_sunny, site.solar_panel_area, site.solar_panel_efficiency,
+                                          INTERVAL_HOURS)
+    return np.round(energy, 2)
+
+def calculate_wind_energy(wind_speed, air_density, site=DEFAULT_SITE):
+    power = wind_power(site.wind_turbine_area, wind_speed, site.wind_turbine_efficiency, air_density)
+    return np.round(power * INTERVAL_HOURS / 1000, 2)  # kWh
+
+def calculate_hydro_energy(precipitation, runoff_coefficient, site=DEFAULT_SITE):
+    runoff_volume = precipitation * runoff_coefficient  # Simplified runoff volume
+    return np.round(hydro_energy_from_volume(runoff_volume, site.head_height, site.hydro_turbine_efficiency), 2)
+
+# Function to generate weather data for every timestamp of a DatetimeIndex
+def generate_indian_weather_data(timestamps, rng, site=DEFAULT_SITE):
+    n = len(timestamps)
+    month = timestamps.month.to_numpy()
+    season_min_temperature = np.array((np.nan, *site.season_min_temperature))  # index: month 1-12
+
+    temperature = np.round(season_min_temperature[month] + rng.uniform(0, site.temperature_range, n), 1)
+    humidity = np.round(rng.uniform(*site.humidity, n), 1)
+    wind_speed = np.round(rng.uniform(*site.wind_speed, n), 1)
+    is_sunny = rng.integers(0, 2, n)  # Equal probability
+    cloud_coverage = np.round(rng.uniform(*site.cloud_cover, n), 1)
+    base_irradiance = rng.uniform(800, 1000, n)  # Max on clear days
+    solar_irradiance = np.round(base_irradiance * (100 - cloud_coverage) / 100, 1)
+    air_density = np.round(1.225 - 0.003 * (temperature - 15), 3)  # 1.225 kg/m³ at sea level
+    precipitation = np.round(rng.uniform(*site.precipitation, n), 1)  # Randomized precipitation
+    runoff_coefficient = np.round(0.05 + 0.005 * precipitation, 2)
+
+    return {
+        "temperature_C": temperature,
+        "humidity_%": humidity,
+        "wind_speed_mps": wind_speed,
+        "is_sunny": is_sunny,
+        "cloud_cover_%": cloud_coverage,
+        "solar_irradiance_Wm2": solar_irradiance,
+        "air_density_kgm3": air_density,
+        "precipitation_mm": precipitation,
+        "runoff_coefficient": runoff_coefficient,
+    }
+
+# Generate one block of rows for the given timestamps. `carry` holds the cumulative
+# totals of a day that started in the previous block, so a day split across blocks
+# keeps accumulating instead of resetting at the block boundary.
+def generate_energy_block(timestamps, rng, carry=None, site=DEFAULT_SITE):
+    n = len(timestamps)
+    weather = generate_indian_weather_data(timestamps, rng, site)
+
+    # Energy consumed and generated per interval
+    tod_factor = time_of_day_factor(timestamps.hour.to_numpy())
+    season_factor = seasonal_factor(timestamps.month.to_numpy())
+    energy_consumed = np.round(site.interval_consumption * tod_factor * season_factor * weather_variation(rng, n), 2)
+    solar_energy = calculate_solar_energy(weather["solar_irradiance_Wm2"], weather["is_sunny"], site)
+    wind_energy = calculate_wind_energy(weather["wind_speed_mps"], weather["air_density_kgm3"], site)
+    hydro_energy = calculate_hydro_energy(weather["precipitation_mm"], weather["runoff_coefficient"], site)
+
+    # Cumulative totals that reset at the start of each day
+    days = timestamps.normalize()
+    energy = np.column_stack([energy_consumed, solar_energy, wind_energy, hydro_energy])
+    cumulative = pd.DataFrame(energy).groupby(days).cumsum().to_numpy(copy=True)
+    if carry is not None:
+        carry_day, carry_totals = carry
+        cumulative[days == carry_day] += carry_totals
+
+    # Add random noise to the cumulative daily values at 23:45
+    end_of_day = (timestamps.hour == 23) & (timestamps.minute == 45)
+    cumulative[end_of_day] += rng.normal(0, noise_std_dev, (int(end_of_day.sum()), 4))
+
+    df = pd.DataFrame({"timestamp": timestamps, "energy_consumed_kWh": cumulative[:, 0], **weather})
+    df["solar_energy_kWh"] = np.round(cumulative[:, 1], 2)
+    df["wind_energy_kWh"] = np.round(cumulative[:, 2], 2)
+    df["hydro_energy_kWh"] = np.round(cumulative[:, 3], 2)
+    return df[COLUMNS], (days[-1], cumulative[-1]) if n else carry
+
+# Generate data with solar, wind, and hydro energy. `seed` may be an int or a
+# np.random.SeedSequence (e.g. one child per site, see sites.py)
+def generate_energy_data(start=START_DATE, end=END_DATE, freq=INTERVAL, seed=None, site=DEFAULT_SITE):
+    rng = np.random.default_rng(seed)
+    df, _ = generate_energy_block(pd.date_range(start, end, freq=freq), rng, site=site)
+    return df
+
+# Stream the dataset in bounded chunks (`chunk` is a pandas frequency such as "MS"
+# for one month or "7D" for a week), so memory does not grow with the date range.
+# The same seed and chunk size always reproduce the same data.
+def iter_energy_chunks(start=START_DATE, end=END_DATE, freq=INTERVAL, seed=None, chunk="MS", site=DEFAULT_SITE):
+    rng = np.random.default_rng(seed)
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    step = pd.Timedelta(freq)
+    edges = [start] + [edge for edge in pd.date_range(start, end, freq=chunk) if edge > start]
+    carry = None
+    for i, edge in enumerate(edges):
+        # First interval on or after the chunk edge, and the end of this chunk
+        lo = start + -((start - edge) // step) * step
+        hi = edges[i + 1] if i + 1 < len(edges) else None
+        if hi is None:
+            timestamps = pd.date_range(lo, end, freq=freq)
+        else:
+            timestamps = pd.date_range(lo, hi, freq=freq, inclusive="left")
+        if len(timestamps) == 0:
+            continue
+        df, carry = generate_energy_block(timestamps, rng, carry, site)
+        yield df
+
+# Write streamed chunks incrementally. CSV goes to a single file; "parquet" and
+# "arrow" (Arrow IPC) write a directory partitioned as year=YYYY/month=MM/. The
+# directory is built next to the target and swapped in at the end, so parts left by
+# an earlier run (e.g. with another --chunk) never sit beside the new ones.
+def write_energy_data(chunks, output, fmt="csv"):
+    if fmt == "csv":
+        for i, df in enumerate(chunks):
+            df.to_csv(output, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        return
+
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    root = Path(output)
+    extension = {"parquet": "parquet", "arrow": "arrow"}[fmt]
+    if root.exists():
+        stray = [path.name for path in root.iterdir() if not path.name.startswith("year=")]
+        if stray:
+            raise ValueError(f"{root} is not a partitioned dataset (contains {stray[:3]}); choose another --output")
+    staging = root.with_name(f".{root.name}.tmp")
+    if staging.exists():
+        shutil.rmtree(staging)
+    staging.mkdir(parents=True)
+    for i, df in enumerate(chunks):
+        timestamps = df["timestamp"]
+        for (year, month), part in df.groupby([timestamps.dt.year, timestamps.dt.month]):
+            directory = staging / f"year={year}" / f"month={month:02d}"
+            directory.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pandas(part, preserve_index=False)
+            path = directory / f"part-{i:05d}.{extension}"
+            if fmt == "parquet":
+                pq.write_table(table, path)
+            else:
+                feather.write_feather(table, path, compression="uncompressed")
+    if root.exists():
+        shutil.rmtree(root)
+    staging.rename(root)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the synthetic energy dataset")
+    parser.add_argument("--start", default=START_DATE)
+    parser.add_argument("--end", default=END_DATE)
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible runs")
+    parser.add_argument("--output", default="energy_data_with_noise.csv",
+                        help="CSV file, or directory for parquet/arrow output")
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"], default="csv")
+    parser.add_argument("--chunk", default="MS", help="Rows generated per step, as a pandas frequency (e.g. MS, 7D)")
+    args = parser.parse_args()
+
+    chunks = iter_energy_chunks(args.start, args.end, seed=args.seed, chunk=args.chunk)
+    write_energy_data(chunks, args.output, args.format)
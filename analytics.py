@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Rows drawn for scatter-type plots, whatever the size of the selected range
+SAMPLE_SIZE = 5000
+
+# Rows folded into the streaming statistics per step
+CHUNK_ROWS = 65536
+
+# Fine bins behind the box-plot quantiles (per value range of the column)
+QUANTILE_BINS = 2048
+
+ENERGY_COLUMNS = ["solar_energy_kWh", "wind_energy_kWh", "hydro_energy_kWh"]
+
+
+# Running count, mean, co-moment matrix, min and max of a set of columns. Chunks are
+# folded in with the pairwise update of Chan et al., so the full range never has to
+# be materialized as one float64 matrix and partial results can be merged.
+class StreamingStats:
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.n = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+        self.min = np.full(k, np.inf)
+        self.max = np.full(k, -np.inf)
+
+    def update(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) == 0:
+            return self
+        other = StreamingStats(self.columns)
+        other.n = len(X)
+        other.mean = X.mean(axis=0)
+        centered = X - other.mean
+        other.comoment = centered.T @ centered
+        other.min = X.min(axis=0)
+        other.max = X.max(axis=0)
+        return self.merge(other)
+
+    def merge(self, other):
+        n = self.n + other.n
+        if n == 0:
+            return self
+        delta = other.mean - self.mean
+        self.comoment = self.comoment + other.comoment + np.outer(delta, delta) * self.n * other.n / n
+        self.mean = self.mean + delta * other.n / n
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        self.n = n
+        return self
+
+    def covariance(self):
+        return pd.DataFrame(self.comoment / max(self.n - 1, 1), index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = self.comoment / np.outer(std, std)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+def streaming_stats(df, columns, chunk_rows=CHUNK_ROWS):
+    stats = StreamingStats(columns)
+    for start in range(0, len(df), chunk_rows):
+        # Slice rows first, so only this chunk's columns are copied
+        stats.update(df.iloc[start:start + chunk_rows][columns].to_numpy(np.float64))
+    return stats
+
+
+# Histogram over fixed bin edges (mergeable across chunks or ranges by adding counts)
+def fixed_histogram(values, edges):
+    counts, _ = np.histogram(values, bins=edges)
+    return counts
+
+# Quantiles read off a fine fixed-bin histogram, interpolating within the bin
+def binned_quantiles(counts, edges, quantiles):
+    cumulative = np.cumsum(counts)
+    total = cumulative[-1]
+    result = []
+    for q in quantiles:
+        target = q * total
+        i = int(np.searchsorted(cumulative, target, side="left"))
+        i = min(i, len(counts) - 1)
+        before = cumulative[i - 1] if i else 0
+        fraction = (target - before) / counts[i] if counts[i] else 0.0
+        result.append(edges[i] + fraction * (edges[i + 1] - edges[i]))
+    return np.array(result)
+
+# Five-number summary (with 1.5 IQR whiskers clipped to the data) per group value
+def box_stats(values, groups, bins=QUANTILE_BINS):
+    values = np.asarray(values, dtype=np.float64)
+    groups = np.asarray(groups)
+    stats = {}
+    for group in np.unique(groups):
+        group_values = values[groups == group]
+        lo, hi = group_values.min(), group_values.max()
+        edges = np.linspace(lo, hi if hi > lo else lo + 1, bins + 1)
+        q1, median, q3 = binned_quantiles(fixed_histogram(group_values, edges), edges, [0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        stats[group] = {"q1": q1, "median": median, "q3": q3,
+                        "lowerfence": max(lo, q1 - 1.5 * iqr), "upperfence": min(hi, q3 + 1.5 * iqr)}
+    return stats
+
+
+# Per-day quotas proportional to day_sizes that add up to exactly `size`
+# (largest-remainder method; ties, such as equal fractions when `size` is smaller
+# than the number of days, are broken at random, which samples the days)
+def _allocate(day_sizes, size, rng):
+    exact = day_sizes * size / day_sizes.sum()
+    quota = np.floor(exact).astype(np.int64)
+    fraction = exact - quota
+    extra = np.lexsort((rng.random(len(day_sizes)), -fraction))[:size - quota.sum()]
+    quota[extra] += 1
+    return quota
+
+# At most `size` rows spread evenly over the days of the range: every day contributes
+# the same share of its rows, so long ranges are not dominated by any one period
+def stratified_sample(df, size=SAMPLE_SIZE, seed=0):
+    if len(df) <= size:
+        return df
+    rng = np.random.default_rng(seed)
+    days = df.index.normalize().to_numpy()
+    # Random rank within each day; keep the rows whose rank falls under the day's quota
+    keys = rng.random(len(df))
+    order = np.lexsort((keys, days))
+    _, day_start = np.unique(days[order], return_index=True)
+    day_sizes = np.diff(np.append(day_start, len(df)))
+    rank = np.arange(len(df)) - np.repeat(day_start, day_sizes)
+    quota = np.repeat(_allocate(day_sizes, size, rng), day_sizes)
+    selected = np.sort(order[rank < quota])
+    return df.iloc[selected]
+
+
+# Everything main.py's statistical plots need for one selected range: streaming
+# correlation, fixed-bin histogram and box-plot statistics over all rows, and a
+# stratified sample for scatter plots
+def summarize_range(df, sample_size=SAMPLE_SIZE, histogram_bins=20):
+    numeric = [column for column in df.columns if column != "timestamp" and pd.api.types.is_numeric_dtype(df[column])]
+    stats = streaming_stats(df, numeric)
+    consumed = df["energy_consumed_kWh"].to_numpy()
+    i = numeric.index("energy_consumed_kWh")
+    edges = np.linspace(stats.min[i], stats.max[i] if stats.max[i] > stats.min[i] else stats.min[i] + 1, histogram_bins + 1)
+    energy_index = [numeric.index(column) for column in ENERGY_COLUMNS]
+    return {
+        "rows": len(df),
+        "correlation": stats.correlation(),
+        "histogram": (fixed_histogram(consumed, edges), edges),
+        "box": box_stats(consumed, df["is_sunny"].to_numpy()),
+        "energy_range": (stats.min[energy_index], stats.max[energy_index]),
+        "sample": stratified_sample(df, sample_size),
+    }
+
+
+# Lightweight Plotly figures built from summarize_range output
+def correlation_figure(summary):
+    return px.imshow(summary["correlation"].round(2), text_auto=True, color_continuous_scale='Blues', title="Correlation Heatmap")
+
+def histogram_figure(summary, column_label="energy_consumed_kWh"):
+    counts, edges = summary["histogram"]
+    fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges)))
+    fig.update_layout(title="Energy Consumption Distribution", xaxis_title=column_label, yaxis_title="count", bargap=0)
+    return fig
+
+def box_figure(summary, title, x_label, y_label):
+    fig = go.Figure()
+    for group, stats in summary["box"].items():
+        fig.add_trace(go.Box(x=[group], name=str(group), q1=[stats["q1"]], median=[stats["median"]], q3=[stats["q3"]],
+                             lowerfence=[stats["lowerfence"]], upperfence=[stats["upperfence"]]))
+    fig.update_layout(title=title, xaxis_title=x_label, yaxis_title=y_label, showlegend=False)
+    return fig
+
+# Scatter matrix of the min-max normalized energy columns (range-wide min/max, sampled rows)
+def energy_pairplot_figure(summary):
+    sample = summary["sample"]
+    lo, hi = summary["energy_range"]
+    normalized = (sample[ENERGY_COLUMNS] - lo) / np.where(hi > lo, hi - lo, 1)
+    normalized["cloud_cover_category"] = pd.cut(sample["cloud_cover_%"], bins=[0, 33, 66, 100], labels=["Low", "Medium", "High"])
+    normalized = normalized.dropna()
+    fig = px.scatter_matrix(normalized, dimensions=ENERGY_COLUMNS, color="cloud_cover_category",
+                            color_discrete_sequence=px.colors.sequential.Viridis[::3], opacity=0.5,
+                            title=f"Normalized Solar, Wind and Hydro Energy ({len(normalized):,} sampled rows)")
+    fig.update_traces(diagonal_visible=False, marker=dict(size=3))
+    return fig
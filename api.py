@@ -0,0 +1,256 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, model_validator
+
+from dataset import FEATURES
+from instrumentation import prometheus_text, timed
+from model_registry import MODEL_DIR, latest_model_key, load_model
+from compiled_forest import INFERENCE_BACKEND, CompiledForest
+
+# Content type for Apache Arrow IPC stream payloads
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+# Micro-batching: requests arriving within MAX_WAIT_SECONDS of each other are scored
+# together in a single model.predict call of at most MAX_BATCH_ROWS rows
+MAX_BATCH_ROWS = int(os.environ.get("MAX_BATCH_ROWS", 4096))
+MAX_WAIT_SECONDS = float(os.environ.get("MAX_WAIT_MS", 2)) / 1000
+
+# Inclusive bounds of the integer features, enforced on row-wise, columnar and Arrow input
+INTEGER_FEATURE_BOUNDS = {"is_sunny": (0, 1), "hour": (0, 23), "minute": (0, 59), "day": (1, 31)}
+
+
+# One row of model inputs, using the same 12 features as main.py
+class FeatureRow(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    temperature_C: float
+    humidity_pct: float = Field(alias="humidity_%")
+    wind_speed_mps: float
+    is_sunny: int = Field(ge=INTEGER_FEATURE_BOUNDS["is_sunny"][0], le=INTEGER_FEATURE_BOUNDS["is_sunny"][1])
+    cloud_cover_pct: float = Field(alias="cloud_cover_%")
+    solar_irradiance_Wm2: float
+    air_density_kgm3: float
+    precipitation_mm: float
+    runoff_coefficient: float
+    hour: int = Field(ge=INTEGER_FEATURE_BOUNDS["hour"][0], le=INTEGER_FEATURE_BOUNDS["hour"][1])
+    minute: int = Field(ge=INTEGER_FEATURE_BOUNDS["minute"][0], le=INTEGER_FEATURE_BOUNDS["minute"][1])
+    day: int = Field(ge=INTEGER_FEATURE_BOUNDS["day"][0], le=INTEGER_FEATURE_BOUNDS["day"][1])
+
+    def to_array(self):
+        return np.array([list(self.model_dump(by_alias=True).values())], dtype=np.float64)
+
+
+# Problems with a column-stacked feature matrix (FEATURES order) that FeatureRow would
+# reject row by row: non-finite values, and integer features that are fractional or
+# out of bounds. Returns one message per offending column.
+def feature_errors(X):
+    errors = []
+    for i, name in enumerate(FEATURES):
+        values = X[:, i]
+        if not np.isfinite(values).all():
+            errors.append(f"{name}: values must be finite")
+        elif name in INTEGER_FEATURE_BOUNDS:
+            lo, hi = INTEGER_FEATURE_BOUNDS[name]
+            if (values != np.round(values)).any():
+                errors.append(f"{name}: values must be integers")
+            elif ((values < lo) | (values > hi)).any():
+                errors.append(f"{name}: values must be between {lo} and {hi}")
+    return errors
+
+
+# Many rows, either row-wise ("rows") or columnar ("columns": {feature: [values]})
+class BatchRequest(BaseModel):
+    rows: list[FeatureRow] | None = None
+    columns: dict[str, list[float]] | None = None
+
+    @model_validator(mode="after")
+    def check_payload(self):
+        if (self.rows is None) == (self.columns is None):
+            raise ValueError("provide exactly one of 'rows' or 'columns'")
+        if self.columns is not None:
+            missing = [name for name in FEATURES if name not in self.columns]
+            if missing:
+                raise ValueError(f"missing feature columns: {missing}")
+            if len({len(self.columns[name]) for name in FEATURES}) != 1:
+                raise ValueError("all feature columns must have the same length")
+            errors = feature_errors(self.to_array())
+            if errors:
+                raise ValueError("; ".join(errors))
+        return self
+
+    def to_array(self):
+        if self.rows is not None:
+            return np.array([list(row.model_dump(by_alias=True).values()) for row in self.rows], dtype=np.float64).reshape(-1, len(FEATURES))
+        return np.column_stack([np.asarray(self.columns[name], dtype=np.float64) for name in FEATURES])
+
+
+class PredictionResponse(BaseModel):
+    prediction: float
+    model_key: str
+
+
+class BatchPredictionResponse(BaseModel):
+    predictions: list[float]
+    model_key: str
+
+
+# Collects concurrent requests and scores them together. Each submit() call hands
+# over a 2-D feature array and waits for its slice of the combined prediction.
+class MicroBatcher:
+    def __init__(self, predict, max_rows=MAX_BATCH_ROWS, max_wait=MAX_WAIT_SECONDS):
+        self.predict = predict
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, X):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((X, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            rows = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while rows < self.max_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                rows += len(item[0])
+            await self._score(batch)
+
+    async def _score(self, batch):
+        try:
+            predictions = await asyncio.to_thread(self.predict, np.vstack([X for X, _ in batch]))
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        start = 0
+        for X, future in batch:
+            if not future.done():
+                future.set_result(predictions[start:start + len(X)])
+            start += len(X)
+
+
+# Load the registered model once at startup (MODEL_KEY, or the latest trained model)
+@asynccontextmanager
+async def lifespan(app):
+    model_dir = os.environ.get("MODEL_DIR", MODEL_DIR)
+    key = os.environ.get("MODEL_KEY") or latest_model_key(model_dir)
+    if key is None:
+        raise RuntimeError(f"No trained model in {model_dir}; run `python model_registry.py train` first")
+    pipeline, metadata = load_model(key, model_dir)
+    compiled = CompiledForest.from_pipeline(pipeline) if INFERENCE_BACKEND == "compiled" else None
+
+    def predict(X):
+        with timed("api_predict", rows=len(X)):
+            if compiled is not None:
+                # Columns are already in metadata["features"] order
+                return compiled.predict(X)
+            return pipeline.predict(pd.DataFrame(X, columns=metadata["features"]))
+
+    app.state.model_key = key
+    app.state.batcher = MicroBatcher(predict)
+    app.state.batcher.start()
+    yield
+    await app.state.batcher.stop()
+
+
+app = FastAPI(title="JSW Energy Consumption API", lifespan=lifespan)
+
+
+def _read_arrow(body):
+    import pyarrow as pa
+
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except pa.ArrowInvalid as exc:
+        raise HTTPException(status_code=400, detail=f"invalid Arrow IPC stream: {exc}")
+    missing = [name for name in FEATURES if name not in table.column_names]
+    if missing:
+        raise HTTPException(status_code=422, detail=f"missing feature columns: {missing}")
+    nulls = [name for name in FEATURES if table.column(name).null_count]
+    if nulls:
+        raise HTTPException(status_code=422, detail=f"null values in feature columns: {nulls}")
+    try:
+        X = np.column_stack([table.column(name).to_numpy(zero_copy_only=False).astype(np.float64) for name in FEATURES])
+    except (ValueError, TypeError, pa.ArrowInvalid) as exc:
+        raise HTTPException(status_code=422, detail=f"feature columns must be numeric: {exc}")
+    errors = feature_errors(X.reshape(-1, len(FEATURES)))
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    return X.reshape(-1, len(FEATURES))
+
+
+@app.get("/health")
+async def health(request: Request):
+    return {"status": "ok", "model_key": request.app.state.model_key}
+
+
+# Stage latencies and counters in the Prometheus text format
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return prometheus_text()
+
+
+@app.post("/predict", response_model=PredictionResponse)
+async def predict(row: FeatureRow, request: Request):
+    predictions = await request.app.state.batcher.submit(row.to_array())
+    return PredictionResponse(prediction=float(predictions[0]), model_key=request.app.state.model_key)
+
+
+# Accepts a JSON BatchRequest, or an Arrow IPC stream with one column per feature
+@app.post("/predict/batch", response_model=BatchPredictionResponse, openapi_extra={
+    "requestBody": {"content": {
+        "application/json": {"schema": BatchRequest.model_json_schema()},
+        ARROW_STREAM: {"schema": {"type": "string", "format": "binary"}},
+    }},
+})
+async def predict_batch(request: Request):
+    body = await request.body()
+    with timed("api_batch_request", payload=body):
+        return await _predict_batch(request, body)
+
+async def _predict_batch(request, body):
+    if request.headers.get("content-type", "").startswith(ARROW_STREAM):
+        X = _read_arrow(body)
+    else:
+        try:
+            X = BatchRequest.model_validate_json(body).to_array()
+        except ValidationError as exc:
+            raise HTTPException(status_code=422, detail=exc.errors(include_url=False, include_context=False))
+    predictions = await request.app.state.batcher.submit(X) if len(X) else np.empty(0)
+    return BatchPredictionResponse(predictions=predictions.tolist(), model_key=request.app.state.model_key)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=os.environ.get("HOST", "127.0.0.1"), port=int(os.environ.get("PORT", 8000)))
@@ -1,39 +1,13 @@
 import streamlit as st
-import math
 import matplotlib.pyplot as plt
+from physics import PlantConfig, estimate_generation, need_to_generate as remaining_demand
+from scenarios import run_latin_hypercube
+from ensemble import ensemble_panel
+from instrumentation import debug_panel, finish_run, start_page, timed, tracked_cache
 
-# Constants
-SOLAR_MAX_IRRADIANCE = 1000  # W/m² (peak sun hours)
-AIR_DENSITY = 1.225  # kg/m³ (standard air density)
-
-# Functions
-def calculate_solar_energy(area, efficiency, cloud_cover, performance_ratio):
-    irradiance = SOLAR_MAX_IRRADIANCE * (1 - cloud_cover / 100)
-    energy = area * efficiency * irradiance * performance_ratio
-    return energy
-
-def calculate_wind_energy(blade_radius, wind_speed, turbine_efficiency, hours):
-    swept_area = math.pi * blade_radius**2
-    power = 0.5 * AIR_DENSITY * swept_area * (wind_speed**3) * turbine_efficiency
-    energy = power * hours / 1000  # Convert Watts to kWh
-    return energy
-
-def calculate_flow_rate(precipitation, catchment_area, runoff_coefficient=0.8):
-    catchment_area_m2 = catchment_area * 1e6
-    precipitation_m = precipitation / 1000
-    flow_volume_m3_per_hour = precipitation_m * catchment_area_m2 * runoff_coefficient
-    flow_rate = flow_volume_m3_per_hour / 3600  # Convert to m³/s
-    return flow_rate
-
-def estimate_hydropower(flow_rate, head_height, efficiency=0.85):
-    density_water = 1000  # kg/m³ (density of water)
-    g = 9.81  # m/s² (acceleration due to gravity)
-    power = density_water * g * flow_rate * head_height * efficiency  # Power in Watts
-    return power / 1000  # Convert to kW
-
-# Streamlit App
-st.sidebar.image(r"C:\Users\suraj\OneDrive\Desktop\Python Virtual Enviornment\jsw energy logo.png", use_container_width=True)
+# Streamlit App (the logo is shown by streamlit_app.py)
 st.title("⚡ Energy Generation and Demand Calculator")
+start_page("app")
 
 # Sidebar inputs
 st.sidebar.header("⚙️ Input Parameters")
@@ -53,14 +27,25 @@ runoff_coefficient = st.sidebar.slider("Runoff Coefficient", 0.6, 0.9, 0.85)
 
 energy_demand = st.number_input("Energy Demand (kWh)", value=200)
 
-# Calculations
-solar_energy = calculate_solar_energy(solar_area, solar_efficiency, cloud_cover, performance_ratio)
-wind_energy = calculate_wind_energy(blade_radius, wind_speed, turbine_efficiency, 24)
-flow_rate = calculate_flow_rate(precipitation, catchment_area, runoff_coefficient)
-hydropower = estimate_hydropower(flow_rate, head_height)
+# Calculations (daily energy in kWh, see physics.py)
+plant = PlantConfig(
+    solar_area=solar_area,
+    solar_efficiency=solar_efficiency,
+    performance_ratio=performance_ratio,
+    blade_radius=blade_radius,
+    turbine_efficiency=turbine_efficiency,
+    catchment_area=catchment_area,
+    head_height=head_height,
+    runoff_coefficient=runoff_coefficient,
+)
+with timed("physics"):
+    generation = estimate_generation(plant, cloud_cover, wind_speed, precipitation, hours=24)
+solar_energy = generation["solar"]
+wind_energy = generation["wind"]
+hydropower = generation["hydro"]
 
-total_energy_generated = solar_energy + wind_energy + hydropower
-need_to_generate = max(0, energy_demand - total_energy_generated)
+total_energy_generated = generation["total"]
+need_to_generate = remaining_demand(energy_demand, total_energy_generated)
 
 # Results Display
 st.subheader("🌞 Energy Generation Results")
@@ -108,4 +93,28 @@ ax.set_title(
 )
 
 # Display the chart in Streamlit
-st.pyplot(fig)
+with timed("pie_chart"):
+    st.pyplot(fig)
+# This process serves every page and session, so release the figure once it is drawn
+plt.close(fig)
+
+# Monte Carlo ensemble around the sidebar weather (see ensemble.py)
+ensemble_panel(plant, cloud_cover, wind_speed, precipitation, energy_demand)
+
+# Scenario sweep over all sidebar parameters (see scenarios.py)
+@tracked_cache(st.cache_data(show_spinner="Evaluating scenarios..."), "run_sweep")
+def run_sweep(samples):
+    return run_latin_hypercube(n=samples, seed=0)
+
+with st.expander("📈 Scenario Sweep"):
+    samples = st.number_input("Scenarios (Latin hypercube over PARAMETER_RANGES)", min_value=10_000,
+                              max_value=10_000_000, value=1_000_000, step=100_000)
+    if st.button("Run Sweep"):
+        tables = run_sweep(int(samples))
+        st.dataframe(tables["overview"])
+        st.markdown("**Sensitivity of the shortfall to each parameter**")
+        st.dataframe(tables["sensitivity"])
+        st.markdown("**Share of scenarios with nothing left to generate, by parameter range**")
+        st.dataframe(tables["coverage"])
+
+debug_panel(finish_run())
@@ -1,74 +1,48 @@
 import streamlit as st
-import requests
-import math
 import matplotlib.pyplot as plt
-import os
+from physics import PlantConfig, estimate_generation, need_to_generate as remaining_demand
+from weather import SyncWeatherClient, WeatherError
+from ensemble import ensemble_panel
+from instrumentation import METRICS, debug_panel, finish_run, start_page, timed, tracked_cache
 
-# Sidebar for navigation between apps
-st.sidebar.image(r"jsw energy logo.png", use_container_width=True)
-st.sidebar.title("Navigation")
+start_page("appapi")
 
-# Dropdown menu for app selection
-app_options = ["Main Application", "App", "AppAPI"]
-selected_app = st.sidebar.selectbox("Choose Application", app_options)
-
-# Constants
-SOLAR_MAX_IRRADIANCE = 5  # kWh/m²/day (approx. for sunny areas in India)
-AIR_DENSITY = 1.225  # kg/m³ (at sea level)
-WATER_DENSITY = 1000  # kg/m³ (density of water)
-GRAVITY = 9.81  # m/s² (acceleration due to gravity)
-# API setup
-API_KEY = "5a5dc4c0a633d9df1f1fd24f47b52ea0"
+# Weather location
 LOCATION = "Pen,IN"  # Replace with your city
-URL = f"http://api.openweathermap.org/data/2.5/weather?q={LOCATION}&appid={API_KEY}"
+
+# One pooled, caching weather client per process (see weather.py); readings are
+# reused for CACHE_TTL_SECONDS instead of being fetched on every rerun
+@tracked_cache(st.cache_resource, "weather_client")
+def get_weather_client():
+    return SyncWeatherClient()
+
 # Fetch data from API
-response = requests.get(URL)
-weather_data = response.json()
-# Check if the request was successful
-if response.status_code == 200:
+try:
+    client = get_weather_client()
+    misses = client.client.misses
+    with timed("weather_fetch"):
+        weather_data = client.get(LOCATION)
+    # The client's own TTL cache decides whether this was a network fetch
+    METRICS.count("cache_requests_total", cache="weather")
+    METRICS.count("cache_misses_total", client.client.misses - misses, cache="weather")
     st.title("🌤️ Weather & Renewable Energy Dashboard")
     st.success("Weather data fetched successfully!")
-else:
-    st.error("Failed to fetch weather data. Please check the API key or city name.")
+except WeatherError as exc:
+    st.error(f"Failed to fetch weather data ({exc}). Please check the API key or city name.")
     st.stop()
 # Extract required values
-cloud_cover = weather_data["clouds"]["all"]  # Cloud cover (%)
-# Parameters for Solar, Wind, and Hydro Energy
-solar_area = 5000  # m² (panel area)
-solar_efficiency = 0.18  # 18%
-performance_ratio = 0.85  # System efficiency
-# Solar Energy Calculation
-def calculate_solar_energy(area, efficiency, cloud_cover, performance_ratio):
-    irradiance = SOLAR_MAX_IRRADIANCE * (1 - cloud_cover / 100)
-    energy = area * efficiency * irradiance * performance_ratio
-    return energy
-solar_energy = calculate_solar_energy(solar_area, solar_efficiency, cloud_cover, performance_ratio)
-# Wind Energy Calculation
-def calculate_wind_energy(blade_radius, wind_speed, turbine_efficiency, hours):
-    swept_area = math.pi * blade_radius**2
-    power = 0.5 * AIR_DENSITY * swept_area * (wind_speed**3) * turbine_efficiency
-    energy = power * hours / 1000  # Convert Watts to kWh
-    return energy
-wind_speed = weather_data["wind"]["speed"]  # Wind speed (m/s)
-blade_radius = 45  # meters (turbine blade length)
-turbine_efficiency = 0.3  # 30%
-hours = 24  # Time in hours
-wind_energy = calculate_wind_energy(blade_radius, wind_speed, turbine_efficiency, hours)
-# Hydropower Calculation
-def estimate_hydropower(flow_rate, head_height, efficiency=0.85):
-    power = WATER_DENSITY * GRAVITY * flow_rate * head_height * efficiency  # Power in Watts
-    return power / 1000  # Convert to kW
-def calculate_flow_rate(precipitation, catchment_area, runoff_coefficient=0.8):
-    catchment_area_m2 = catchment_area * 1e6
-    precipitation_m = precipitation / 1000
-    flow_volume_m3_per_hour = precipitation_m * catchment_area_m2 * runoff_coefficient
-    return flow_volume_m3_per_hour / 3600  # Convert to m³/s
+cloud_cover = weather_data["cloud_cover"]  # Cloud cover (%)
+# Plant parameters (5000 m² of panels, 45 m turbine blades, 2 km² catchment with a
+# 20 m head; see PlantConfig) and the precipitation assumed for hydropower
+plant = PlantConfig()
+wind_speed = weather_data["wind_speed"]  # Wind speed (m/s)
 precipitation = 50  # mm/hour
-catchment_area = 2  # km²
-head_height = 20  # meters
-runoff_coefficient = 0.85
-flow_rate = calculate_flow_rate(precipitation, catchment_area, runoff_coefficient)
-hydropower = estimate_hydropower(flow_rate, head_height)
+# Daily energy from each source (kWh), see physics.py
+with timed("physics"):
+    generation = estimate_generation(plant, cloud_cover, wind_speed, precipitation, hours=24)
+solar_energy = generation["solar"]
+wind_energy = generation["wind"]
+hydropower = generation["hydro"]
 # Styling the outputs
 st.markdown("### 🌥️ **Weather Data**")
 st.markdown(f"- **Cloud Cover**: **{cloud_cover}%**")
@@ -77,12 +51,12 @@ st.markdown(f"- **Precipitation**: **{precipitation} mm/hour**")
 st.markdown("### 🔋 **Energy Generation**")
 st.markdown(f"- **Solar Energy Generated**: **{solar_energy:.2f} kWh/day**")
 st.markdown(f"- **Wind Energy Generated**: **{wind_energy:.2f} kWh/day**")
-st.markdown(f"- **Hydropower Generated**: **{hydropower:.2f} kW**")
+st.markdown(f"- **Hydropower Generated**: **{hydropower:.2f} kWh/day**")
 # User input for energy demand
 st.markdown("### ⚡ **Energy Demand**")
 energy_demand = st.number_input("Enter the energy demand (in kWh):", min_value=0.0, value=0.0)
-total_energy_generated = solar_energy + wind_energy + hydropower
-need_to_generate = max(0, energy_demand - total_energy_generated)
+total_energy_generated = generation["total"]
+need_to_generate = remaining_demand(energy_demand, total_energy_generated)
 st.markdown(f"- **Total Energy Generated**: **{total_energy_generated:.2f} kWh/day**")
 st.markdown(f"- **Energy Demand**: **{energy_demand:.2f} kWh/day**")
 st.markdown(f"- **Remaining to Generate**: **{need_to_generate:.2f} kWh/day**")
@@ -118,15 +92,12 @@ ax.set_title(
     color='white'
 )
 # Display the chart in Streamlit
-st.pyplot(fig)
-
+with timed("pie_chart"):
+    st.pyplot(fig)
+# This process serves every page and session, so release the figure once it is drawn
+plt.close(fig)
 
-# Add a button to navigate to the selected application
-if st.sidebar.button("Go to Selected App"):
-    if selected_app == "Main Application":
-        os.system("streamlit run main.py")  # Redirect to main.py
-    elif selected_app == "App":
-        os.system("streamlit run app.py")  # Redirect to app.py
-    elif selected_app == "AppAPI":
-        os.system("streamlit run appapi.py")
+# Monte Carlo ensemble around the fetched weather (see ensemble.py)
+ensemble_panel(plant, cloud_cover, wind_speed, precipitation, energy_demand)
 
+debug_panel(finish_run())
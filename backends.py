@@ -0,0 +1,246 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from dataset import (DATA_PATH, SCHEMA, dataset_hash, file_fingerprint, load_energy_data, prepare_energy_data,
+                     select_date_range)
+from downsample import PLOT_COLUMNS, ROLLUP_FREQUENCIES, build_rollups
+
+# Engine used for load -> filter -> feature -> aggregate: "pandas" (whole CSV in
+# memory, the default) or a lazy, out-of-core engine over the partitioned Parquet
+# written by `addingnoise.py --format parquet`: "polars", "duckdb" or "arrow"
+DATA_BACKEND = os.environ.get("DATA_BACKEND", "pandas")
+
+# CSV file for the pandas backend, partition directory for the others
+PARQUET_PATH = "energy_parquet"
+DATA_SOURCE = os.environ.get("DATA_SOURCE") or (DATA_PATH if DATA_BACKEND == "pandas" else PARQUET_PATH)
+
+# Calendar features added by dataset.add_time_features
+TIME_FEATURES = ["hour", "minute", "day"]
+
+# Weekly buckets start on Sunday, as pandas' "1W" (W-SUN) rollups do
+WEEK_ORIGIN = pd.Timestamp("2000-01-02")
+
+
+# Interval [start, end + 1 day) for an inclusive date range, as select_date_range uses
+def _bounds(start_date, end_date):
+    return pd.Timestamp(start_date), pd.Timestamp(end_date) + pd.Timedelta(days=1)
+
+# Year/month partitions overlapping [start, end), encoded as year * 100 + month
+def _partition_bounds(start, end):
+    last = end - pd.Timedelta(microseconds=1)
+    return start.year * 100 + start.month, last.year * 100 + last.month
+
+# Engine output to the frame shape the pandas path produces: compact dtypes, time
+# features and a DatetimeIndex
+def _to_energy_frame(df):
+    df = df.drop(columns=[column for column in ("year", "month") if column in df.columns])
+    df = df.astype({column: dtype for column, dtype in SCHEMA.items() if column in df.columns})
+    return prepare_energy_data(df)
+
+# Stored columns to read for a projection: always the timestamp, never the time
+# features derived from it (those are added after loading)
+def _with_timestamp(columns):
+    if columns is None:
+        return None
+    return ["timestamp"] + [column for column in columns if column not in ("timestamp", *TIME_FEATURES)]
+
+
+# Whole dataset in one pandas frame (the small-data default)
+class PandasBackend:
+    def __init__(self, path=DATA_PATH):
+        self.path = path
+        self.df = prepare_energy_data(load_energy_data(path))
+
+    def date_bounds(self):
+        return self.df.index[0], self.df.index[-1]
+
+    # Rows between two dates (inclusive) with time features, indexed by timestamp
+    def load_range(self, start_date=None, end_date=None, columns=None):
+        df = self.df
+        if start_date is not None or end_date is not None:
+            df = select_date_range(df, start_date or df.index[0], end_date or df.index[-1])
+        return df if columns is None else df[_with_timestamp(columns) + TIME_FEATURES]
+
+    # Mean of `columns` per `freq` bucket (labelled by bucket start)
+    def aggregate(self, freq, columns=PLOT_COLUMNS, start_date=None, end_date=None):
+        values = self.load_range(start_date, end_date)[list(columns)]
+        return values.resample(freq, label="left", closed="left").mean().dropna(how="all")
+
+    def rollups(self, columns=PLOT_COLUMNS):
+        return build_rollups(self.df, columns)
+
+
+# Shared behaviour of the partitioned Parquet backends: only aggregates and the
+# selected range are ever materialized in memory
+class PartitionedBackend:
+    def __init__(self, path=PARQUET_PATH):
+        self.path = Path(path)
+        if not self.path.is_dir():
+            raise FileNotFoundError(f"No partitioned dataset at {path}; run `python addingnoise.py --format parquet --output {path}`")
+
+    def rollups(self, columns=PLOT_COLUMNS):
+        return {freq: self.aggregate(freq, columns) for freq in ROLLUP_FREQUENCIES}
+
+    def _range(self, start_date, end_date):
+        if start_date is None and end_date is None:
+            return None
+        first, last = self.date_bounds()
+        return _bounds(start_date or first.normalize(), end_date or last.normalize())
+
+
+# Polars lazy frames: the filter and column selection are pushed into the Parquet
+# scan, which skips partitions and row groups outside the range
+class PolarsBackend(PartitionedBackend):
+    def _scan(self, date_range):
+        import polars as pl
+
+        lazy = pl.scan_parquet(self.path / "**" / "*.parquet", hive_partitioning=True)
+        if date_range is not None:
+            start, end = date_range
+            lo, hi = _partition_bounds(start, end)
+            lazy = lazy.filter((pl.col("year") * 100 + pl.col("month")).is_between(lo, hi)
+                               & (pl.col("timestamp") >= start) & (pl.col("timestamp") < end))
+        return lazy
+
+    def date_bounds(self):
+        import polars as pl
+
+        bounds = self._scan(None).select(pl.col("timestamp").min().alias("first"),
+                                         pl.col("timestamp").max().alias("last")).collect()
+        return pd.Timestamp(bounds["first"][0]), pd.Timestamp(bounds["last"][0])
+
+    def load_range(self, start_date=None, end_date=None, columns=None):
+        lazy = self._scan(self._range(start_date, end_date))
+        if columns is not None:
+            lazy = lazy.select(_with_timestamp(columns))
+        return _to_energy_frame(lazy.sort("timestamp").collect().to_pandas())
+
+    def aggregate(self, freq, columns=PLOT_COLUMNS, start_date=None, end_date=None):
+        import polars as pl
+
+        every = pd.Timedelta(freq)
+        lazy = (self._scan(self._range(start_date, end_date))
+                .select(["timestamp", *columns])
+                .sort("timestamp")
+                .with_columns(bucket=pl.col("timestamp").dt.truncate(f"{int(every.total_seconds())}s")
+                              if freq != "1W" else
+                              pl.col("timestamp").dt.offset_by("1d").dt.truncate("1w").dt.offset_by("-1d"))
+                .group_by("bucket").agg([pl.col(column).mean() for column in columns])
+                .sort("bucket"))
+        result = lazy.collect().to_pandas().set_index("bucket")
+        result.index = pd.DatetimeIndex(result.index).rename(None)
+        return result.dropna(how="all")
+
+
+# DuckDB SQL over the Parquet partitions, with the same pushdown
+class DuckDBBackend(PartitionedBackend):
+    def __init__(self, path=PARQUET_PATH):
+        import duckdb
+
+        super().__init__(path)
+        self.connection = duckdb.connect()
+
+    def _query(self, sql, params=()):
+        # A cursor per query: Streamlit reruns run on different threads
+        return self.connection.cursor().execute(sql, list(params)).df()
+
+    # FROM clause and WHERE clause with their bound parameters (the path is a parameter
+    # too, so any character in it is safe)
+    def _source(self, date_range):
+        source = "read_parquet(?, hive_partitioning = true, hive_types = {'year': INTEGER, 'month': INTEGER})"
+        params = ((self.path / "**" / "*.parquet").as_posix(),)
+        if date_range is None:
+            return source, "", params
+        start, end = date_range
+        lo, hi = _partition_bounds(start, end)
+        where = "WHERE year * 100 + month BETWEEN ? AND ? AND timestamp >= ? AND timestamp < ?"
+        return source, where, params + (lo, hi, start.to_pydatetime(), end.to_pydatetime())
+
+    def date_bounds(self):
+        source, _, params = self._source(None)
+        bounds = self._query(f"SELECT min(timestamp) AS first, max(timestamp) AS last FROM {source}", params)
+        return pd.Timestamp(bounds["first"][0]), pd.Timestamp(bounds["last"][0])
+
+    def load_range(self, start_date=None, end_date=None, columns=None):
+        source, where, params = self._source(self._range(start_date, end_date))
+        select = "*" if columns is None else ", ".join(f'"{column}"' for column in _with_timestamp(columns))
+        return _to_energy_frame(self._query(f"SELECT {select} FROM {source} {where} ORDER BY timestamp", params))
+
+    def aggregate(self, freq, columns=PLOT_COLUMNS, start_date=None, end_date=None):
+        source, where, params = self._source(self._range(start_date, end_date))
+        seconds = int(pd.Timedelta(freq).total_seconds())
+        means = ", ".join(f'avg("{column}") AS "{column}"' for column in columns)
+        bucket = f"time_bucket(INTERVAL '{seconds} seconds', timestamp, TIMESTAMP '{WEEK_ORIGIN}')"
+        result = self._query(f"SELECT {bucket} AS bucket, {means} FROM {source} {where} GROUP BY bucket ORDER BY bucket",
+                             params)
+        result = result.set_index("bucket")
+        result.index = pd.DatetimeIndex(result.index).rename(None)
+        return result.dropna(how="all")
+
+
+# pyarrow.dataset: filters prune partitions and row groups; aggregates are folded in
+# record batch by record batch, so memory stays bounded by the batch size
+class ArrowBackend(PartitionedBackend):
+    def __init__(self, path=PARQUET_PATH):
+        import pyarrow.dataset as ds
+
+        super().__init__(path)
+        self.dataset = ds.dataset(self.path, format="parquet", partitioning="hive")
+
+    def _filter(self, date_range):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if date_range is None:
+            return None
+        start, end = date_range
+        lo, hi = _partition_bounds(start, end)
+        timestamp_type = self.dataset.schema.field("timestamp").type
+        partition = ds.field("year") * 100 + ds.field("month")
+        return ((partition >= lo) & (partition <= hi)
+                & (ds.field("timestamp") >= pa.scalar(start.to_pydatetime(), timestamp_type))
+                & (ds.field("timestamp") < pa.scalar(end.to_pydatetime(), timestamp_type)))
+
+    def date_bounds(self):
+        import pyarrow.compute as pc
+
+        bounds = pc.min_max(self.dataset.to_table(columns=["timestamp"])["timestamp"]).as_py()
+        return pd.Timestamp(bounds["min"]), pd.Timestamp(bounds["max"])
+
+    def load_range(self, start_date=None, end_date=None, columns=None):
+        table = self.dataset.to_table(columns=_with_timestamp(columns), filter=self._filter(self._range(start_date, end_date)))
+        return _to_energy_frame(table.to_pandas().sort_values("timestamp", ignore_index=True))
+
+    def aggregate(self, freq, columns=PLOT_COLUMNS, start_date=None, end_date=None):
+        columns = list(columns)
+        partials = []
+        for batch in self.dataset.to_batches(columns=["timestamp", *columns], filter=self._filter(self._range(start_date, end_date))):
+            frame = batch.to_pandas()
+            if frame.empty:
+                continue
+            buckets = frame.pop("timestamp").dt.floor(freq) if freq != "1W" else \
+                WEEK_ORIGIN + ((frame.pop("timestamp") - WEEK_ORIGIN) // pd.Timedelta("7D")) * pd.Timedelta("7D")
+            grouped = frame.groupby(buckets.to_numpy())
+            partials.append(grouped.sum(min_count=1).join(grouped.count(), rsuffix="_count"))
+        if not partials:
+            return pd.DataFrame(columns=columns)
+        totals = pd.concat(partials).groupby(level=0).sum(min_count=1)
+        result = pd.DataFrame({column: totals[column] / totals[f"{column}_count"] for column in columns})
+        result.index = pd.DatetimeIndex(result.index)
+        return result.sort_index().dropna(how="all")
+
+
+BACKENDS = {"pandas": PandasBackend, "polars": PolarsBackend, "duckdb": DuckDBBackend, "arrow": ArrowBackend}
+
+def make_backend(name=None, source=None):
+    name = name or DATA_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown data backend: {name}")
+    return BACKENDS[name](source or (DATA_SOURCE if name == DATA_BACKEND else
+                                     DATA_PATH if name == "pandas" else PARQUET_PATH))
+
+# Identity and content hash of any backend's source (CSV file or partition directory)
+source_fingerprint = file_fingerprint
+source_hash = dataset_hash
@@ -0,0 +1,114 @@
+import argparse
+import itertools
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from dataset import DATA_PATH, FEATURES, TARGET, load_energy_data, prepare_energy_data, select_date_range
+
+INTERVALS_PER_DAY = 96
+
+# Candidate models and the hyperparameter grid searched for each
+SEARCH_SPACE = {
+    "rf": (RandomForestRegressor, {"n_estimators": [2, 20, 50], "max_depth": [3, 8, 12], "random_state": [42]}),
+    "hgb": (HistGradientBoostingRegressor, {"max_iter": [100, 300], "learning_rate": [0.05, 0.1], "max_leaf_nodes": [31, 63], "random_state": [42]}),
+    "linear": (Ridge, {"alpha": [0.1, 1.0, 10.0]}),
+}
+
+
+def candidates(models=None):
+    for name in models or SEARCH_SPACE:
+        estimator, grid = SEARCH_SPACE[name]
+        keys = list(grid)
+        for values in itertools.product(*(grid[key] for key in keys)):
+            yield name, estimator, dict(zip(keys, values))
+
+# Rolling-origin splits: each fold tests on the `test_days` after its training window.
+# Training windows expand from the start unless `max_train_days` caps them.
+def rolling_origin_splits(n_rows, folds=5, test_days=30, max_train_days=None):
+    splitter = TimeSeriesSplit(
+        n_splits=folds,
+        test_size=test_days * INTERVALS_PER_DAY,
+        max_train_size=max_train_days * INTERVALS_PER_DAY if max_train_days else None,
+    )
+    return list(splitter.split(np.arange(n_rows)))
+
+# Fit and score one candidate on one fold; timings are wall-clock seconds
+def evaluate_fold(name, estimator, params, X, y, train, test, fold):
+    pipeline = make_pipeline(StandardScaler(), estimator(**params))
+    started = time.perf_counter()
+    pipeline.fit(X[train], y[train])
+    fit_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    y_pred = pipeline.predict(X[test])
+    predict_seconds = time.perf_counter() - started
+    return {
+        "model": name,
+        "params": json.dumps(params, sort_keys=True),
+        "fold": fold,
+        "train_rows": len(train),
+        "test_rows": len(test),
+        "rmse": float(np.sqrt(mean_squared_error(y[test], y_pred))),
+        "mae": float(mean_absolute_error(y[test], y_pred)),
+        "r2": float(r2_score(y[test], y_pred)),
+        "fit_seconds": fit_seconds,
+        "predict_seconds": predict_seconds,
+        "predict_us_per_row": predict_seconds / len(test) * 1e6,
+    }
+
+# Backtest every candidate on every fold in parallel and rank the candidates by
+# mean out-of-sample RMSE. Returns (leaderboard, per-fold results).
+def run_search(df, models=None, folds=5, test_days=30, max_train_days=None, n_jobs=-1, latency_budget_us=None):
+    X = df[FEATURES].to_numpy(np.float64)
+    y = df[TARGET].to_numpy(np.float64)
+    splits = rolling_origin_splits(len(df), folds, test_days, max_train_days)
+    tasks = [
+        delayed(evaluate_fold)(name, estimator, params, X, y, train, test, fold)
+        for name, estimator, params in candidates(models)
+        for fold, (train, test) in enumerate(splits)
+    ]
+    results = pd.DataFrame(Parallel(n_jobs=n_jobs)(tasks))
+    leaderboard = (
+        results.groupby(["model", "params"])
+        .agg(rmse=("rmse", "mean"), rmse_std=("rmse", "std"), mae=("mae", "mean"), r2=("r2", "mean"),
+             fit_seconds=("fit_seconds", "mean"), predict_seconds=("predict_seconds", "mean"),
+             predict_us_per_row=("predict_us_per_row", "mean"))
+        .reset_index()
+        .sort_values("rmse", ignore_index=True)
+    )
+    if latency_budget_us is not None:
+        leaderboard["within_budget"] = leaderboard["predict_us_per_row"] <= latency_budget_us
+    return leaderboard, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest and hyperparameter search for the consumption model")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--models", nargs="+", choices=list(SEARCH_SPACE), default=None)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--test-days", type=int, default=30)
+    parser.add_argument("--max-train-days", type=int, default=None, help="Rolling instead of expanding training window")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--latency-budget-us", type=float, default=None, help="Flag models predicting slower than this per row")
+    parser.add_argument("--output", default="leaderboard", help="Prefix for the leaderboard .csv/.json and per-fold results")
+    args = parser.parse_args()
+
+    df = prepare_energy_data(load_energy_data(args.data))
+    df = select_date_range(df, args.start or df.index[0], args.end or df.index[-1])
+    leaderboard, results = run_search(df, args.models, args.folds, args.test_days, args.max_train_days,
+                                      args.n_jobs, args.latency_budget_us)
+    leaderboard.to_csv(f"{args.output}.csv", index=False)
+    leaderboard.to_json(f"{args.output}.json", orient="records", indent=2)
+    results.to_csv(f"{args.output}_folds.csv", index=False)
+    print(leaderboard.to_string())
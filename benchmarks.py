@@ -0,0 +1,199 @@
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from addingnoise import END_DATE, START_DATE, generate_energy_data
+from analytics import box_figure, correlation_figure, energy_pairplot_figure, histogram_figure, summarize_range
+from dataset import FEATURES, load_energy_data, prepare_energy_data, read_energy_csv, select_date_range
+from downsample import PLOT_COLUMNS, build_rollups, series_for_plot
+from model_registry import train_model
+from physics import PlantConfig, estimate_generation, need_to_generate
+
+# Data scales: (start, end, number of sites). Sites are independent datasets with
+# their own seed, as the plant dashboards would load them.
+SCALES = {
+    "1m": ("2020-01-01 00:00", "2020-01-31 23:45", 1),
+    "1y": ("2020-01-01 00:00", "2020-12-31 23:45", 1),
+    "6y": (START_DATE, END_DATE, 1),
+    "10sites": ("2020-01-01 00:00", "2020-12-31 23:45", 10),
+}
+DEFAULT_SCALES = ["1m", "1y"]
+
+# Date ranges filtered per site in the filtering benchmark
+FILTER_QUERIES = 100
+
+
+# Each benchmark takes the prepared scale context, does any untimed setup and returns
+# the callable that is timed
+def bench_generate(ctx):
+    start, end, sites = ctx["scale"]
+    return lambda: [generate_energy_data(start, end, seed=site) for site in range(sites)]
+
+def bench_csv_load(ctx):
+    # Cold load as main.py does it on a fresh CSV: parse with the compact schema, then index
+    return lambda: [prepare_energy_data(read_energy_csv(path)) for path in ctx["paths"]]
+
+def bench_cached_load(ctx):
+    # Warm load from the Parquet sidecar written by the first load_energy_data call
+    for path in ctx["paths"]:
+        load_energy_data(path)
+    return lambda: [prepare_energy_data(load_energy_data(path)) for path in ctx["paths"]]
+
+def bench_filter(ctx):
+    rng = np.random.default_rng(0)
+    queries = []
+    for df in ctx["frames"]:
+        days = df.index.normalize().unique()
+        starts = rng.integers(0, len(days), FILTER_QUERIES)
+        lengths = rng.integers(1, 31, FILTER_QUERIES)
+        ends = np.minimum(starts + lengths, len(days) - 1)
+        queries.append((df, days[starts], days[ends]))
+    return lambda: [select_date_range(df, lo, hi)[FEATURES] for df, starts, ends in queries
+                    for lo, hi in zip(starts, ends)]
+
+def bench_fit(ctx):
+    return lambda: [train_model(df) for df in ctx["frames"]]
+
+def bench_predict(ctx):
+    models = [train_model(df) for df in ctx["frames"]]
+    return lambda: [model.predict(df[FEATURES]) for model, df in zip(models, ctx["frames"])]
+
+def bench_physics(ctx):
+    # app.py/appapi.py estimates, evaluated once per row of weather readings
+    plant = PlantConfig()
+    weather = [(df["cloud_cover_%"].to_numpy(np.float64), df["wind_speed_mps"].to_numpy(np.float64),
+                df["precipitation_mm"].to_numpy(np.float64)) for df in ctx["frames"]]
+    def run():
+        for cloud_cover, wind_speed, precipitation in weather:
+            generation = estimate_generation(plant, cloud_cover, wind_speed, precipitation)
+            need_to_generate(50_000, generation["total"])
+    return run
+
+def bench_figures(ctx):
+    # Everything main.py draws after "Run Prediction" over the full range
+    rollups = [build_rollups(df) for df in ctx["frames"]]
+    def run():
+        for df, site_rollups in zip(ctx["frames"], rollups):
+            summary = summarize_range(df)
+            for column in PLOT_COLUMNS:
+                x, y, _ = series_for_plot(df, column, site_rollups)
+                go.Figure(go.Scatter(x=x, y=y, mode="lines"))
+            correlation_figure(summary)
+            histogram_figure(summary)
+            box_figure(summary, "Energy Consumption by Sunny Day", "is_sunny", "energy_consumed_kWh")
+            energy_pairplot_figure(summary)
+    return run
+
+BENCHMARKS = {
+    "generate": bench_generate,
+    "csv_load": bench_csv_load,
+    "cached_load": bench_cached_load,
+    "filter": bench_filter,
+    "fit": bench_fit,
+    "predict": bench_predict,
+    "physics": bench_physics,
+    "figures": bench_figures,
+}
+
+
+# Generate and write each site's dataset once per scale (not timed)
+def prepare_scale(name, workdir):
+    start, end, sites = SCALES[name]
+    paths, frames = [], []
+    for site in range(sites):
+        path = Path(workdir) / f"{name}_site{site}.csv"
+        df = generate_energy_data(start, end, seed=site)
+        df.to_csv(path, index=False)
+        paths.append(path)
+        frames.append(prepare_energy_data(read_energy_csv(path)))
+    return {"scale": SCALES[name], "paths": paths, "frames": frames}
+
+# Time `repeat` runs, then one extra run under tracemalloc for the peak allocation
+# (kept separate because tracing slows the code it measures). tracemalloc sees
+# allocations made through Python and NumPy, not those inside Arrow or the CSV parser.
+def measure(run, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "min_seconds": min(timings),
+        "median_seconds": float(np.median(timings)),
+        "mean_seconds": float(np.mean(timings)),
+        "peak_memory_mb": peak / 2**20,
+    }
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+def run_benchmarks(scales=DEFAULT_SCALES, benchmarks=None, repeat=3):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in scales:
+            ctx = prepare_scale(scale, workdir)
+            rows = sum(len(df) for df in ctx["frames"])
+            for name in benchmarks or BENCHMARKS:
+                result = {"scale": scale, "benchmark": name, "rows": rows, "repeat": repeat,
+                          **measure(BENCHMARKS[name](ctx), repeat)}
+                print(f"{scale:>8} {name:<12} {result['min_seconds']:9.4f}s  {result['peak_memory_mb']:9.1f} MB")
+                results.append(result)
+    return {"environment": environment(), "results": results}
+
+# Benchmarks whose best time grew by more than `tolerance` (0.2 = 20%) against a baseline run
+def compare(current, baseline, tolerance=0.2):
+    before = {(r["scale"], r["benchmark"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = before.get((result["scale"], result["benchmark"]))
+        if old and result["min_seconds"] > old["min_seconds"] * (1 + tolerance):
+            regressions.append({"scale": result["scale"], "benchmark": result["benchmark"],
+                                "baseline_seconds": old["min_seconds"], "current_seconds": result["min_seconds"],
+                                "ratio": result["min_seconds"] / old["min_seconds"]})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and memory benchmarks across data scales")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=DEFAULT_SCALES)
+    parser.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmarks.json")
+    parser.add_argument("--baseline", default=None, help="Earlier benchmarks.json to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.scales, args.benchmarks, args.repeat)
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['scale']} {r['benchmark']}: {r['baseline_seconds']:.4f}s -> "
+                  f"{r['current_seconds']:.4f}s ({r['ratio']:.2f}x)")
+        raise SystemExit(1 if regressions else 0)
@@ -0,0 +1,198 @@
+import argparse
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from model_registry import MODEL_DIR, has_model, latest_model_key, load_model
+
+# Inference path used by main.py and the API: "sklearn" (pipeline.predict) or
+# "compiled" (CompiledForest below)
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "sklearn")
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _traverse(X, roots, feature, threshold, left, right, value, max_depth):
+    # All rows through all trees at once, one tree level per step. Leaves point to
+    # themselves, so rows that reach a leaf early stay there.
+    node = np.broadcast_to(roots, (len(X), len(roots))).copy()
+    rows = np.arange(len(X))[:, None]
+    for _ in range(max_depth):
+        go_left = X[rows, feature[node]] <= threshold[node]
+        node = np.where(go_left, left[node], right[node])
+    return value[node]
+
+def _predict_numpy(X, roots, feature, threshold, left, right, value, max_depth):
+    leaf_values = _traverse(X, roots, feature, threshold, left, right, value, max_depth)
+    # Trees are summed in order, then divided, exactly as RandomForestRegressor does
+    return np.cumsum(leaf_values, axis=1)[:, -1] / len(roots)
+
+if numba is not None:
+    @numba.njit(cache=True, nogil=True)
+    def _predict_numba(X, roots, feature, threshold, left, right, value, max_depth):
+        out = np.zeros(X.shape[0])
+        for i in range(X.shape[0]):
+            total = 0.0
+            for t in range(roots.shape[0]):
+                node = roots[t]
+                while left[node] != node:
+                    if X[i, feature[node]] <= threshold[node]:
+                        node = left[node]
+                    else:
+                        node = right[node]
+                total += value[node]
+            out[i] = total / roots.shape[0]
+        return out
+
+
+# A fitted StandardScaler + RandomForestRegressor pipeline flattened into contiguous
+# node arrays. All trees share one set of arrays (a tree's nodes are offset by its
+# root index), so scoring a batch is a handful of vectorized NumPy operations, or a
+# Numba loop when numba is installed, with no per-estimator Python overhead.
+# Predictions are bit-for-bit identical to pipeline.predict: inputs are scaled in the
+# dtype sklearn would use, cast to float32 for the trees, compared against float64
+# thresholds, and tree outputs are summed in order before dividing.
+class CompiledForest:
+    def __init__(self, features, mean, scale, roots, feature, threshold, left, right, value, max_depth):
+        self.features = list(features)
+        self.mean = mean
+        self.scale = scale
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.max_depth = int(max_depth)
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        scaler, forest = pipeline[0], pipeline[-1]
+        if forest.n_outputs_ != 1:
+            raise ValueError("Only single-output forests can be compiled")
+        roots, features, thresholds, lefts, rights, values = [], [], [], [], [], []
+        offset = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left == -1
+            roots.append(offset)
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+            values.append(tree.value[:, 0, 0])
+            offset += tree.node_count
+        return cls(
+            features=getattr(pipeline, "feature_names_in_", range(forest.n_features_in_)),
+            mean=scaler.mean_ if scaler.with_mean else None,
+            scale=scaler.scale_ if scaler.with_std else None,
+            roots=np.asarray(roots, dtype=np.int32),
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values).astype(np.float64),
+            max_depth=max(estimator.tree_.max_depth for estimator in forest.estimators_),
+        )
+
+    @property
+    def nbytes(self):
+        arrays = [self.roots, self.feature, self.threshold, self.left, self.right, self.value]
+        return sum(array.nbytes for array in arrays)
+
+    def _scaled(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[self.features]
+        X = np.array(X, copy=True)
+        if X.dtype not in (np.float32, np.float64):
+            X = X.astype(np.float64)
+        X = np.atleast_2d(X)
+        # In place and in the input dtype, like StandardScaler.transform, so rounding matches
+        if self.mean is not None:
+            X -= self.mean.astype(X.dtype, copy=False)
+        if self.scale is not None:
+            X /= self.scale.astype(X.dtype, copy=False)
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def predict(self, X, engine=None):
+        X = self._scaled(X)
+        engine = engine or ("numba" if numba is not None else "numpy")
+        kernel = _predict_numba if engine == "numba" else _predict_numpy
+        return kernel(X, self.roots, self.feature, self.threshold, self.left, self.right, self.value, self.max_depth)
+
+    def save(self, path):
+        np.savez(path, features=np.array(self.features), mean=self.mean, scale=self.scale, roots=self.roots,
+                 feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+                 value=self.value, max_depth=self.max_depth)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=True) as arrays:
+            fields = {name: arrays[name] for name in arrays.files}
+        fields["features"] = fields["features"].tolist()
+        for name in ("mean", "scale"):
+            if fields[name].shape == ():
+                fields[name] = None
+        return cls(**fields)
+
+
+# Compiled form of a registered model, built once per process
+@lru_cache(maxsize=8)
+def load_compiled(key, model_dir=MODEL_DIR):
+    return CompiledForest.from_pipeline(load_model(key, model_dir)[0])
+
+# Raise if the compiled forest differs from the pipeline in any bit on X
+def verify(pipeline, compiled, X, engine=None):
+    expected = pipeline.predict(X)
+    actual = compiled.predict(X, engine)
+    mismatched = np.flatnonzero(expected != actual)
+    if len(mismatched):
+        raise AssertionError(f"{len(mismatched)} of {len(expected)} predictions differ, first at row {mismatched[0]}: "
+                             f"{expected[mismatched[0]]!r} != {actual[mismatched[0]]!r}")
+
+
+if __name__ == "__main__":
+    from dataset import DATA_PATH, FEATURES, load_energy_data, prepare_energy_data
+
+    parser = argparse.ArgumentParser(description="Compile a registered model and check it against sklearn")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--key", default=None, help="Model key (default: latest)")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    key = args.key or latest_model_key(args.model_dir)
+    if key is None:
+        parser.error(f"No trained model in {args.model_dir}; run `python model_registry.py train` first")
+    if not has_model(key, args.model_dir):
+        parser.error(f"No model {key} in {args.model_dir}; see `python model_registry.py list`")
+    pipeline = load_model(key, args.model_dir)[0]
+    compiled = CompiledForest.from_pipeline(pipeline)
+    X = prepare_energy_data(load_energy_data(args.data))[FEATURES]
+    engines = ["numpy"] + (["numba"] if numba is not None else [])
+    for engine in engines:
+        verify(pipeline, compiled, X, engine)
+    print(f"Model {key}: {len(compiled.roots)} trees, {len(compiled.value)} nodes, {compiled.nbytes:,} bytes; "
+          f"identical to sklearn on {len(X):,} rows ({', '.join(engines)})")
+
+    # Latency per call; the compiled forest is timed on arrays (no DataFrame overhead)
+    for rows in (1, 96, 10_000):
+        batch = X.iloc[:rows]
+        array = batch.to_numpy()
+        calls = [("sklearn", lambda: pipeline.predict(batch))]
+        calls += [(engine, lambda engine=engine: compiled.predict(array, engine)) for engine in engines]
+        timings = {}
+        for name, call in calls:
+            call()
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                call()
+            timings[name] = (time.perf_counter() - started) / args.repeat * 1e6
+        print(f"{rows:>6} rows: " + ", ".join(f"{name} {us:,.1f} us" for name, us in timings.items()))
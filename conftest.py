@@ -0,0 +1 @@
+# Lets `pytest` import the top-level modules (dataset.py, api.py, ...) from tests/
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+# Default dataset written by addingnoise.py
+DATA_PATH = "energy_data_with_noise.csv"
+
+# Compact column types for the generated dataset (timestamp is parsed at read time)
+SCHEMA = {
+    "energy_consumed_kWh": "float32",
+    "temperature_C": "float32",
+    "humidity_%": "float32",
+    "wind_speed_mps": "float32",
+    "is_sunny": "uint8",
+    "cloud_cover_%": "float32",
+    "solar_irradiance_Wm2": "float32",
+    "air_density_kgm3": "float32",
+    "precipitation_mm": "float32",
+    "runoff_coefficient": "float32",
+    "solar_energy_kWh": "float32",
+    "wind_energy_kWh": "float32",
+    "hydro_energy_kWh": "float32",
+}
+
+# Model inputs and target used by main.py, the model registry and the API
+FEATURES = [
+    "temperature_C", "humidity_%", "wind_speed_mps", "is_sunny", "cloud_cover_%",
+    "solar_irradiance_Wm2", "air_density_kgm3", "precipitation_mm", "runoff_coefficient",
+    "hour", "minute", "day",
+]
+TARGET = "energy_consumed_kWh"
+
+# Key stored in the Parquet sidecar to record which version of the CSV it was built from
+SIDECAR_METADATA_KEY = b"source_fingerprint"
+
+
+# Files holding a dataset: the CSV itself, or every part of a partitioned Parquet
+# directory written by `addingnoise.py --format parquet`
+def dataset_files(path):
+    path = Path(path)
+    return sorted(path.rglob("*.parquet")) if path.is_dir() else [path]
+
+# Cheap identity of the source (latest mtime, total size); changes whenever a file is rewritten
+def file_fingerprint(path):
+    stats = [os.stat(f) for f in dataset_files(path)]
+    return max((stat.st_mtime_ns for stat in stats), default=0), sum(stat.st_size for stat in stats)
+
+# Content hash of the source, used to key trained models to the data they saw
+def dataset_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    for file in dataset_files(path):
+        if Path(path).is_dir():
+            digest.update(file.relative_to(path).as_posix().encode())
+        with open(file, "rb") as f:
+            for block in iter(lambda: f.read(chunk_size), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+def sidecar_path(path):
+    path = Path(path)
+    return path.with_name(path.name + ".parquet")
+
+def read_energy_csv(path):
+    return pd.read_csv(path, dtype=SCHEMA, parse_dates=["timestamp"])
+
+def _read_sidecar(path, fingerprint):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None
+    sidecar = sidecar_path(path)
+    if not sidecar.exists():
+        return None
+    metadata = pq.read_schema(sidecar).metadata or {}
+    if json.loads(metadata.get(SIDECAR_METADATA_KEY, b"null")) != list(fingerprint):
+        return None
+    return pq.read_table(sidecar).to_pandas()
+
+def _write_sidecar(path, df, fingerprint):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = {**(table.schema.metadata or {}), SIDECAR_METADATA_KEY: json.dumps(list(fingerprint)).encode()}
+    table = table.replace_schema_metadata(metadata)
+    # Write to a temporary file first so a concurrent reader never sees a partial sidecar
+    sidecar = sidecar_path(path)
+    tmp = sidecar.with_name(sidecar.name + f".{os.getpid()}.tmp")
+    try:
+        pq.write_table(table, tmp)
+        os.replace(tmp, sidecar)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+
+# Load the dataset with the compact schema. The parsed result is kept in a Parquet
+# sidecar next to the CSV and reused until the CSV's mtime or size changes.
+def load_energy_data(path=DATA_PATH):
+    fingerprint = file_fingerprint(path)
+    df = _read_sidecar(path, fingerprint)
+    if df is None:
+        df = read_energy_csv(path)
+        _write_sidecar(path, df, fingerprint)
+    return df
+
+# Calendar features used by the consumption model, computed once per load
+def add_time_features(df):
+    timestamps = df["timestamp"].dt
+    df["hour"] = timestamps.hour.astype("uint8")
+    df["minute"] = timestamps.minute.astype("uint8")
+    df["day"] = timestamps.day.astype("uint8")
+    return df
+
+# Sort by time and index the frame by timestamp so date ranges can be located by
+# binary search. The timestamp column is kept for plotting and existing callers.
+def prepare_energy_data(df):
+    if not df["timestamp"].is_monotonic_increasing:
+        df = df.sort_values("timestamp", ignore_index=True)
+    df = add_time_features(df)
+    df.index = pd.DatetimeIndex(df["timestamp"].to_numpy())
+    return df
+
+# Rows between two dates (inclusive) of a frame from prepare_energy_data. Uses
+# searchsorted on the sorted index and returns a positional slice, which is a view
+# rather than a copy of the selected rows.
+def select_date_range(df, start_date, end_date):
+    lo = df.index.searchsorted(pd.Timestamp(start_date), side="left")
+    hi = df.index.searchsorted(pd.Timestamp(end_date) + pd.Timedelta(days=1), side="left")
+    return df.iloc[lo:hi]
+
+# Rows up to and including a timestamp (e.g. "now") of an already time-sorted frame
+def select_until(df, timestamp):
+    return df.iloc[:df.index.searchsorted(pd.Timestamp(timestamp), side="right")]
+
+# Per-interval values of the cumulative columns, which addingnoise.py resets at the
+# start of each day (the first interval of a day is its own increment)
+def interval_values(df, columns=("energy_consumed_kWh", "solar_energy_kWh", "wind_energy_kWh", "hydro_energy_kWh")):
+    cumulative = df[list(columns)]
+    increments = cumulative.diff()
+    new_day = df["timestamp"].dt.normalize().diff().ne(pd.Timedelta(0)).to_numpy()
+    increments[new_day] = cumulative[new_day]
+    return increments
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+# Upper bound on points sent to the browser per chart trace
+MAX_POINTS = 5000
+
+# Resolutions tried from finest to coarsest once the raw data exceeds MAX_POINTS
+ROLLUP_FREQUENCIES = ["1h", "1D", "1W"]
+
+# Columns plotted by main.py
+PLOT_COLUMNS = ["energy_consumed_kWh", "solar_irradiance_Wm2"]
+
+
+# Mean of each column per hour, day and week, computed once per dataset and labelled
+# by bucket start. Input is a frame indexed by timestamp (see dataset.prepare_energy_data).
+def build_rollups(df, columns=PLOT_COLUMNS):
+    values = df[list(columns)]
+    return {freq: values.resample(freq, label="left", closed="left").mean().dropna(how="all")
+            for freq in ROLLUP_FREQUENCIES}
+
+# Finest resolution that keeps a time span within max_points (None = raw rows)
+def choose_resolution(start, end, raw_points, max_points=MAX_POINTS):
+    if raw_points <= max_points:
+        return None
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    for freq in ROLLUP_FREQUENCIES:
+        if span / pd.Timedelta(freq) <= max_points:
+            return freq
+    return ROLLUP_FREQUENCIES[-1]
+
+# x/y arrays for one column of a time-sorted slice, at the finest resolution that
+# fits in `max_points`: the raw rows, else a precomputed rollup, else min-max
+# downsampling of the coarsest rollup. Also returns the resolution used (None = raw).
+def series_for_plot(slice_df, column, rollups=None, max_points=MAX_POINTS):
+    freq = None
+    if len(slice_df):
+        freq = choose_resolution(slice_df.index[0], slice_df.index[-1], len(slice_df), max_points)
+    if freq is None:
+        return slice_df.index, slice_df[column].to_numpy(), None
+    if rollups is not None and column in rollups[freq]:
+        # Buckets overlapping the slice, located by binary search on the rollup index
+        rollup = rollups[freq][column]
+        lo = rollup.index.searchsorted(slice_df.index[0] - pd.Timedelta(freq), side="right")
+        hi = rollup.index.searchsorted(slice_df.index[-1], side="right")
+        series = rollup.iloc[lo:hi]
+    else:
+        series = slice_df[column].resample(freq, label="left", closed="left").mean().dropna()
+    x, y = minmax_downsample(series.index.to_numpy(), series.to_numpy(), max_points)
+    return pd.DatetimeIndex(x), y, freq
+
+# Aggregate an arbitrary series (e.g. model predictions for the raw rows) to the
+# resolution series_for_plot chose
+def aggregate_to(index, values, freq):
+    if freq is None:
+        return index, np.asarray(values)
+    series = pd.Series(np.asarray(values), index=index).resample(freq, label="left", closed="left").mean().dropna()
+    return series.index, series.to_numpy()
+
+
+# Keep the minimum and maximum of each of max_points / 2 equal-count buckets, in time
+# order, so spikes survive downsampling
+def minmax_downsample(x, y, max_points=MAX_POINTS):
+    if len(y) <= max_points:
+        return x, y
+    keep = ~np.isnan(y)
+    x, y = x[keep], y[keep]
+    n = len(y)
+    buckets = max_points // 2
+    bucket_of = np.arange(n) * buckets // n
+    # Sort by (bucket, value): each bucket's first entry is its min, its last its max
+    order = np.lexsort((y, bucket_of))
+    starts = np.searchsorted(bucket_of[order], np.arange(buckets))
+    ends = np.append(starts[1:], n) - 1
+    index = np.unique(np.concatenate([order[starts], order[ends]]))
+    return x[index], y[index]
+
+# Largest-Triangle-Three-Buckets: keeps the points that best preserve the visual shape
+def lttb(x, y, max_points=MAX_POINTS):
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return x, y
+    xs = np.asarray(x)
+    if np.issubdtype(xs.dtype, np.datetime64):
+        xs = xs.astype("datetime64[ns]").astype(np.int64)
+    xs = xs.astype(np.float64)
+    ys = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = xs[next_lo:next_hi].mean() if next_hi > next_lo else xs[-1]
+        avg_y = ys[next_lo:next_hi].mean() if next_hi > next_lo else ys[-1]
+        area = np.abs((xs[previous] - avg_x) * (ys[lo:hi] - ys[previous])
+                      - (xs[previous] - xs[lo:hi]) * (avg_y - ys[previous]))
+        previous = lo + int(np.argmax(area))
+        selected[i + 1] = previous
+    return np.asarray(x)[selected], np.asarray(y)[selected]
@@ -0,0 +1,126 @@
+import argparse
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from addingnoise import DEFAULT_SITE
+from dataset import DATA_PATH, load_energy_data
+from physics import PlantConfig, estimate_generation, need_to_generate
+
+# Weather inputs that are perturbed, their dataset columns and physical bounds
+WEATHER_INPUTS = ["cloud_cover", "wind_speed", "precipitation"]
+WEATHER_COLUMNS = {"cloud_cover": "cloud_cover_%", "wind_speed": "wind_speed_mps", "precipitation": "precipitation_mm"}
+WEATHER_BOUNDS = {"cloud_cover": (0, 100), "wind_speed": (0, None), "precipitation": (0, None)}
+
+ENSEMBLE_MEMBERS = 5000
+PERCENTILES = [10, 50, 90]
+ERROR_POOL_SIZE = 100_000  # errors drawn once for the "generator" source
+ERROR_SOURCES = ["generator", "historical"]
+
+
+# Pools of weather errors (one aligned array per input) that ensemble members are
+# resampled from:
+# - "generator": the uniform draws addingnoise.py makes for each interval, centred
+#   on zero (cloud cover ±50 %, wind ±4.5 m/s, precipitation ±5 mm)
+# - "historical": deviations of each interval from its day's mean in the dataset, so
+#   the spread and the correlation between inputs are the observed ones
+@lru_cache(maxsize=4)
+def weather_errors(source="generator", path=DATA_PATH):
+    if source == "generator":
+        rng = np.random.default_rng(0)
+        widths = {"cloud_cover": np.ptp(DEFAULT_SITE.cloud_cover), "wind_speed": np.ptp(DEFAULT_SITE.wind_speed),
+                  "precipitation": np.ptp(DEFAULT_SITE.precipitation)}
+        return {name: rng.uniform(-0.5, 0.5, ERROR_POOL_SIZE) * widths[name] for name in WEATHER_INPUTS}
+    if source == "historical":
+        df = load_energy_data(path)
+        days = df["timestamp"].dt.normalize()
+        values = df[list(WEATHER_COLUMNS.values())].astype(np.float64)
+        deviations = values - values.groupby(days).transform("mean")
+        return {name: deviations[column].to_numpy() for name, column in WEATHER_COLUMNS.items()}
+    raise ValueError(f"Unknown error source: {source}")
+
+# Member weather: the inputs plus `scale` times errors resampled jointly from the
+# pool (the same pool row for every input), clipped to physical bounds
+def perturb_weather(weather, errors, members, rng, scale=1.0):
+    rows = rng.integers(0, len(errors[WEATHER_INPUTS[0]]), members)
+    return {name: np.clip(weather[name] + scale * errors[name][rows], *WEATHER_BOUNDS[name]) for name in WEATHER_INPUTS}
+
+# Run `members` perturbed weather scenarios through the generation formulas in one
+# batched call. Returns P10/P50/P90 of every source and of the shortfall, the
+# probability that generation exceeds demand and the expected shortfall.
+def run_ensemble(plant, cloud_cover, wind_speed, precipitation, energy_demand, members=ENSEMBLE_MEMBERS,
+                 source="generator", scale=1.0, seed=0, hours=24):
+    rng = np.random.default_rng(seed)
+    weather = {"cloud_cover": cloud_cover, "wind_speed": wind_speed, "precipitation": precipitation}
+    draws = perturb_weather(weather, weather_errors(source), members, rng, scale)
+    generation = estimate_generation(plant, draws["cloud_cover"], draws["wind_speed"], draws["precipitation"], hours)
+    shortfall = need_to_generate(energy_demand, generation["total"])
+    outputs = {**generation, "need_to_generate": shortfall}
+    bands = pd.DataFrame({name: np.percentile(np.broadcast_to(values, members), PERCENTILES)
+                          for name, values in outputs.items()}, index=[f"P{p}" for p in PERCENTILES])
+    return {
+        "bands": bands,
+        "prob_exceeds_demand": float(np.mean(generation["total"] > energy_demand)),
+        "expected_shortfall": float(shortfall.mean()),
+        "members": members,
+    }
+
+# Rows of the bands table for display: one per source, percentiles as columns
+def bands_table(result):
+    labels = {"solar": "Solar Energy", "wind": "Wind Energy", "hydro": "Hydropower",
+              "total": "Total Energy Generated", "need_to_generate": "Need to Generate"}
+    return result["bands"].T.rename(index=labels).rename(columns=lambda p: f"{p} (kWh/day)")
+
+
+# Streamlit helpers (streamlit is imported lazily so the CLI can use this module)
+
+# run_ensemble behind one Streamlit cache per process, keyed by the input tuple
+@lru_cache(maxsize=1)
+def _cached_run_ensemble():
+    import streamlit as st
+    from instrumentation import tracked_cache
+    return tracked_cache(st.cache_data(max_entries=256), "run_ensemble")(run_ensemble)
+
+# "Ensemble Forecast" expander of app.py and appapi.py around one weather reading
+def ensemble_panel(plant, cloud_cover, wind_speed, precipitation, energy_demand):
+    import streamlit as st
+    with st.expander("🎲 Ensemble Forecast"):
+        members = st.number_input("Ensemble members", min_value=1000, max_value=100_000, value=ENSEMBLE_MEMBERS, step=1000)
+        source = st.radio("Weather errors", ERROR_SOURCES, horizontal=True,
+                          help="generator: addingnoise.py's distributions; historical: fitted from the dataset")
+        scale = st.slider("Error scale", 0.0, 2.0, 1.0, 0.1)
+        try:
+            result = _cached_run_ensemble()(plant, cloud_cover, wind_speed, precipitation, energy_demand,
+                                            int(members), source, scale)
+        except FileNotFoundError:
+            st.error("The historical errors need the dataset; run `python addingnoise.py` first.")
+        else:
+            col1, col2 = st.columns(2)
+            col1.metric("P(generation > demand)", f"{result['prob_exceeds_demand']:.1%}")
+            col2.metric("Expected shortfall", f"{result['expected_shortfall']:,.2f} kWh/day")
+            st.dataframe(bands_table(result))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo generation and shortfall bands for one weather forecast")
+    parser.add_argument("--cloud-cover", type=float, default=50)
+    parser.add_argument("--wind-speed", type=float, default=10)
+    parser.add_argument("--precipitation", type=float, default=50)
+    parser.add_argument("--demand", type=float, default=200)
+    parser.add_argument("--members", type=int, default=ENSEMBLE_MEMBERS)
+    parser.add_argument("--source", choices=ERROR_SOURCES, default="generator")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier on the weather errors")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    weather_errors(args.source)
+    started = time.perf_counter()
+    result = run_ensemble(PlantConfig(), args.cloud_cover, args.wind_speed, args.precipitation, args.demand,
+                          args.members, args.source, args.scale, args.seed)
+    seconds = time.perf_counter() - started
+    print(bands_table(result).to_string(float_format=lambda v: f"{v:,.2f}"))
+    print(f"P(generation > demand) = {result['prob_exceeds_demand']:.3f}, "
+          f"expected shortfall = {result['expected_shortfall']:,.2f} kWh/day "
+          f"({result['members']:,} members in {seconds * 1000:.1f} ms)")
@@ -0,0 +1,222 @@
+import argparse
+import time
+from collections import deque
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from dataset import DATA_PATH, interval_values, load_energy_data, prepare_energy_data, select_date_range
+
+FORECASTER_PATH = "models/forecaster.joblib"
+
+INTERVALS_PER_HOUR = 4
+
+# Past consumption (per 15-minute interval) seen by the features: lags and trailing
+# windows, in intervals. Windows include the current interval.
+LAGS = {"lag_15min": 1, "lag_1h": 4, "lag_24h": 96, "lag_7d": 672}
+WINDOWS = {"1h": 4, "24h": 96, "7d": 672}
+HISTORY = max(max(LAGS.values()), max(WINDOWS.values())) + 1
+
+# Current weather readings used alongside the consumption history
+WEATHER_COLUMNS = [
+    "temperature_C", "humidity_%", "wind_speed_mps", "is_sunny", "cloud_cover_%",
+    "solar_irradiance_Wm2", "air_density_kgm3", "precipitation_mm", "runoff_coefficient",
+]
+
+FEATURE_COLUMNS = (
+    ["consumption_kWh", "consumed_today_kWh", "interval_of_day", "hour", "dayofweek", "month"]
+    + WEATHER_COLUMNS
+    + list(LAGS)
+    + [f"{stat}_{name}" for name in WINDOWS for stat in ("mean", "max")]
+)
+
+# Forecast horizons in hours (every hour out to two days)
+HORIZON_HOURS = list(range(1, 49))
+
+
+def _calendar(timestamps):
+    timestamps = pd.DatetimeIndex(timestamps)
+    return {
+        "interval_of_day": timestamps.hour * INTERVALS_PER_HOUR + timestamps.minute // 15,
+        "hour": timestamps.hour,
+        "dayofweek": timestamps.dayofweek,
+        "month": timestamps.month,
+    }
+
+def _shift(x, lag):
+    out = np.full(len(x), np.nan)
+    out[lag:] = x[:len(x) - lag]
+    return out
+
+# Trailing mean from a running sum and trailing max over a strided window view
+# (no copy of the windows); the first `window - 1` rows have no full window
+def _rolling_mean(x, window):
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        cumulative = np.concatenate([[0.0], np.cumsum(x)])
+        out[window - 1:] = (cumulative[window:] - cumulative[:-window]) / window
+    return out
+
+def _rolling_max(x, window):
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        out[window - 1:] = sliding_window_view(x, window).max(axis=1)
+    return out
+
+
+# Forecasting features for every row of a time-sorted frame (see
+# dataset.prepare_energy_data). Consumption is turned back into per-interval values
+# (the dataset's column resets each day); the running daily total is kept as a feature.
+# Rows without a full 7-day history contain NaN.
+def build_features(df):
+    consumption = interval_values(df, ["energy_consumed_kWh"])["energy_consumed_kWh"].to_numpy(np.float64)
+    columns = {
+        "consumption_kWh": consumption,
+        "consumed_today_kWh": df["energy_consumed_kWh"].to_numpy(np.float64),
+        **_calendar(df["timestamp"]),
+        **{column: df[column].to_numpy(np.float64) for column in WEATHER_COLUMNS},
+        **{name: _shift(consumption, lag) for name, lag in LAGS.items()},
+    }
+    for name, window in WINDOWS.items():
+        columns[f"mean_{name}"] = _rolling_mean(consumption, window)
+        columns[f"max_{name}"] = _rolling_max(consumption, window)
+    return pd.DataFrame({column: np.asarray(columns[column], dtype=np.float32) for column in FEATURE_COLUMNS},
+                        index=df.index)
+
+# Consumption `h` hours after each row, one column per horizon; rows whose furthest
+# horizon runs past the data are NaN
+def build_targets(df, horizon_hours=HORIZON_HOURS):
+    consumption = interval_values(df, ["energy_consumed_kWh"])["energy_consumed_kWh"].to_numpy(np.float64)
+    steps = np.asarray(horizon_hours) * INTERVALS_PER_HOUR
+    targets = np.full((len(df), len(steps)), np.nan, dtype=np.float32)
+    if len(consumption) > steps[-1]:
+        # Row t of the window view holds consumption[t : t + max_step + 1]
+        windows = sliding_window_view(consumption, steps[-1] + 1)
+        targets[:len(windows)] = windows[:, steps]
+    return pd.DataFrame(targets, index=df.index, columns=[f"h{h}" for h in horizon_hours])
+
+
+# The same features as build_features, maintained one reading at a time: a ring buffer
+# of the last HISTORY intervals, running window sums and monotonic deques for the
+# window maxima, so each update costs O(1) (amortized for the maxima) whatever the
+# history length.
+class FeatureState:
+    def __init__(self):
+        self.buffer = np.zeros(HISTORY)
+        self.count = 0
+        self.sums = {name: 0.0 for name in WINDOWS}
+        self.maxima = {name: deque() for name in WINDOWS}
+        self.last_day = None
+        self.last_total = 0.0
+        self.last_timestamp = None
+
+    def _past(self, lag):
+        return self.buffer[(self.count - lag) % HISTORY] if self.count >= lag else np.nan
+
+    # Fold in one reading (a mapping with energy_consumed_kWh and the weather columns)
+    # and return its feature vector, ordered as FEATURE_COLUMNS
+    def update(self, timestamp, reading):
+        timestamp = pd.Timestamp(timestamp)
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            raise ValueError(f"Readings must be newer than {self.last_timestamp}; got {timestamp}")
+        total = float(reading["energy_consumed_kWh"])
+        day = timestamp.normalize()
+        value = total - self.last_total if day == self.last_day else total
+        self.last_day, self.last_total, self.last_timestamp = day, total, timestamp
+
+        features = {"consumption_kWh": value, "consumed_today_kWh": total}
+        features.update({name: self._past(lag) for name, lag in LAGS.items()})
+        t = self.count
+        for name, window in WINDOWS.items():
+            # Running sum: add the new value, drop the one leaving the window
+            self.sums[name] += value - (self.buffer[(t - window) % HISTORY] if t >= window else 0.0)
+            maxima = self.maxima[name]
+            while maxima and maxima[-1][1] <= value:
+                maxima.pop()
+            maxima.append((t, value))
+            if maxima[0][0] <= t - window:
+                maxima.popleft()
+            full = t + 1 >= window
+            features[f"mean_{name}"] = self.sums[name] / window if full else np.nan
+            features[f"max_{name}"] = maxima[0][1] if full else np.nan
+        self.buffer[t % HISTORY] = value
+        self.count += 1
+
+        features.update(interval_of_day=timestamp.hour * INTERVALS_PER_HOUR + timestamp.minute // 15,
+                        hour=timestamp.hour, dayofweek=timestamp.dayofweek, month=timestamp.month)
+        features.update({column: float(reading[column]) for column in WEATHER_COLUMNS})
+        return np.array([features[column] for column in FEATURE_COLUMNS], dtype=np.float32)
+
+
+# Direct multi-horizon forecaster: one multi-output regressor maps the features at
+# time t to consumption at every horizon, so a forecast for all horizons is a single
+# predict call (no recursive feeding of predictions)
+class MultiHorizonForecaster:
+    def __init__(self, estimator=None, horizon_hours=HORIZON_HOURS):
+        if estimator is None:
+            estimator = RandomForestRegressor(n_estimators=20, max_depth=10, min_samples_leaf=20, random_state=42)
+        self.pipeline = make_pipeline(StandardScaler(), estimator)
+        self.horizon_hours = list(horizon_hours)
+
+    def fit(self, df):
+        X = build_features(df)
+        y = build_targets(df, self.horizon_hours)
+        complete = X.notna().all(axis=1).to_numpy() & y.notna().all(axis=1).to_numpy()
+        self.pipeline.fit(X[complete], y[complete].to_numpy())
+        return self
+
+    # (rows, horizons) array of per-interval consumption forecasts, in kWh
+    def predict(self, features):
+        if isinstance(features, np.ndarray):
+            features = pd.DataFrame(np.atleast_2d(features), columns=FEATURE_COLUMNS)
+        return np.atleast_2d(self.pipeline.predict(features))
+
+    # Forecast from a single feature vector (e.g. FeatureState.update) as a Series
+    # indexed by the forecast timestamps
+    def forecast(self, timestamp, features):
+        index = pd.Timestamp(timestamp) + pd.to_timedelta(self.horizon_hours, unit="h")
+        return pd.Series(self.predict(features)[0], index=index, name="consumption_kWh")
+
+    def save(self, path=FORECASTER_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path=FORECASTER_PATH):
+        return joblib.load(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train and evaluate the multi-horizon consumption forecaster")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--estimator", choices=["rf", "ridge"], default="rf")
+    parser.add_argument("--test-days", type=int, default=30, help="Days held out at the end for evaluation")
+    parser.add_argument("--output", default=FORECASTER_PATH)
+    args = parser.parse_args()
+
+    df = prepare_energy_data(load_energy_data(args.data))
+    df = select_date_range(df, args.start or df.index[0], args.end or df.index[-1])
+    split = len(df) - args.test_days * 96
+    forecaster = MultiHorizonForecaster(Ridge() if args.estimator == "ridge" else None)
+    started = time.perf_counter()
+    forecaster.fit(df.iloc[:split])
+    print(f"Fit on {split:,} rows in {time.perf_counter() - started:.2f}s")
+
+    X = build_features(df).iloc[split:]
+    y = build_targets(df).iloc[split:]
+    complete = y.notna().all(axis=1).to_numpy()
+    started = time.perf_counter()
+    predictions = forecaster.predict(X[complete])
+    print(f"Predicted {complete.sum():,} rows x {len(forecaster.horizon_hours)} horizons in {time.perf_counter() - started:.2f}s")
+    rmse = np.sqrt(np.mean((predictions - y[complete].to_numpy()) ** 2, axis=0))
+    print(pd.Series(rmse, index=y.columns, name="rmse_kWh").iloc[[0, 5, 11, 23, 47]].to_string())
+    forecaster.save(args.output)
@@ -0,0 +1,308 @@
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dataset import SCHEMA
+from optimizer import INTERVALS_PER_PERIOD, PRODUCTION_LIMIT_KWH
+
+# Cumulative columns of a reading. Like addingnoise.py's output, each one counts up
+# from the start of the day and resets at midnight.
+CHANNELS = ["energy_consumed_kWh", "solar_energy_kWh", "wind_energy_kWh", "hydro_energy_kWh"]
+
+NS_PER_DAY = 86_400 * 10**9
+NS_PER_INTERVAL = NS_PER_DAY // INTERVALS_PER_PERIOD
+
+# Intervals kept per unit (one week), readings used for the grid-draw rate behind the
+# end-of-day projection (one hour), and bounds on queued batches and kept alerts
+BUFFER_INTERVALS = 7 * INTERVALS_PER_PERIOD
+PROJECTION_INTERVALS = 4
+QUEUE_BATCHES = 1000
+ALERT_HISTORY = 1000
+
+# Feeds started by the live dashboard: "stub" (replayed generator output, one
+# 15-minute step every INGEST_STEP_SECONDS) and/or "socket" on INGEST_PORT
+INGEST_SOURCES = os.environ.get("INGEST_SOURCES", "stub").split(",")
+INGEST_UNITS = int(os.environ.get("INGEST_UNITS", 10))
+INGEST_STEP_SECONDS = float(os.environ.get("INGEST_STEP_SECONDS", 0.5))
+INGEST_PORT = int(os.environ.get("INGEST_PORT", 8765))
+
+
+# Fixed-size ring buffer of one unit's per-interval values, with today's running
+# totals. Each reading updates everything in O(1); memory never grows.
+class UnitBuffer:
+    def __init__(self, unit, capacity=BUFFER_INTERVALS):
+        self.unit = unit
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((capacity, len(CHANNELS)))  # per-interval increments
+        self.grid = np.zeros(capacity)  # consumption not covered by generation
+        self.count = 0
+        self.last_timestamp = None
+        self.day = None
+        self.totals = (0.0,) * len(CHANNELS)  # today's cumulative readings
+        self.grid_today = 0.0
+        self.recent_grid = 0.0  # sum of the last PROJECTION_INTERVALS grid values
+        self.alerted_day = None
+
+    # Fold in one reading; returns False (and changes nothing) if it is not newer
+    # than the last reading of this unit
+    def add(self, timestamp, consumed, solar, wind, hydro):
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return False
+        day = timestamp // NS_PER_DAY
+        if day != self.day:
+            # Daily reset: the first reading of a day is its own increment
+            self.day = day
+            self.totals = (0.0,) * len(CHANNELS)
+            self.grid_today = 0.0
+        previous = self.totals
+        increments = (consumed - previous[0], solar - previous[1], wind - previous[2], hydro - previous[3])
+        self.totals = (consumed, solar, wind, hydro)
+        grid = max(increments[0] - increments[1] - increments[2] - increments[3], 0.0)
+
+        slot = self.count % self.capacity
+        if self.count >= PROJECTION_INTERVALS:
+            self.recent_grid -= float(self.grid[(self.count - PROJECTION_INTERVALS) % self.capacity])
+        self.recent_grid += grid
+        self.timestamps[slot] = timestamp
+        self.values[slot] = increments
+        self.grid[slot] = grid
+        self.grid_today += grid
+        self.count += 1
+        self.last_timestamp = timestamp
+        return True
+
+    # Today's grid draw so far plus the last hour's rate over the rest of the day
+    def projected_grid(self):
+        if self.count == 0:
+            return 0.0
+        rate = self.recent_grid / min(self.count, PROJECTION_INTERVALS)
+        remaining = INTERVALS_PER_PERIOD - 1 - (self.last_timestamp % NS_PER_DAY) // NS_PER_INTERVAL
+        return self.grid_today + rate * remaining
+
+    # Buffered intervals, oldest first
+    def history(self):
+        n = min(self.count, self.capacity)
+        order = (np.arange(self.count - n, self.count)) % self.capacity
+        frame = pd.DataFrame(self.values[order], columns=CHANNELS, index=pd.to_datetime(self.timestamps[order]))
+        frame["grid_kWh"] = self.grid[order]
+        return frame
+
+
+# Receives batches of readings from any number of sources on an asyncio queue and
+# keeps a UnitBuffer per unit. A reading is a tuple
+# (unit, timestamp in ns, consumed, solar, wind, hydro) of cumulative daily values.
+# Alerts are raised once per unit and day when the projected grid draw exceeds `limit`.
+class Ingestor:
+    def __init__(self, limit=PRODUCTION_LIMIT_KWH, capacity=BUFFER_INTERVALS, on_alert=None):
+        self.limit = limit
+        self.capacity = capacity
+        self.on_alert = on_alert
+        self.units = {}
+        self.alerts = deque(maxlen=ALERT_HISTORY)
+        self.received = 0
+        self.rejected = 0
+        self.lock = threading.Lock()  # dashboards read from other threads
+        self.queue = None
+
+    def ingest(self, readings):
+        with self.lock:
+            for unit, timestamp, consumed, solar, wind, hydro in readings:
+                buffer = self.units.get(unit)
+                if buffer is None:
+                    buffer = self.units[unit] = UnitBuffer(unit, self.capacity)
+                self.received += 1
+                if not buffer.add(timestamp, consumed, solar, wind, hydro):
+                    self.rejected += 1
+                    continue
+                if buffer.alerted_day != buffer.day:
+                    projected = buffer.projected_grid()
+                    if projected > self.limit:
+                        buffer.alerted_day = buffer.day
+                        self._alert(unit, timestamp, projected)
+
+    # Count readings that could not be parsed (sources call this from any thread)
+    def reject(self, count=1):
+        with self.lock:
+            self.received += count
+            self.rejected += count
+
+    def _alert(self, unit, timestamp, projected):
+        alert = {"unit": unit, "timestamp": pd.Timestamp(timestamp), "projected_grid_kWh": float(projected),
+                 "limit_kWh": self.limit}
+        self.alerts.append(alert)
+        if self.on_alert is not None:
+            self.on_alert(alert)
+
+    # Queue a batch for the worker; waits when the queue is full (backpressure)
+    async def submit(self, readings):
+        await self.queue.put(readings)
+
+    async def consume(self, source):
+        async for batch in source:
+            await self.submit(batch)
+
+    # Process queued batches until cancelled
+    async def run(self):
+        self.queue = asyncio.Queue(QUEUE_BATCHES)
+        while True:
+            batch = await self.queue.get()
+            self.ingest(batch)
+            self.queue.task_done()
+
+    # One row per unit: today's totals, grid draw and projection
+    def summary(self):
+        with self.lock:
+            rows = [{"unit": unit, "last_reading": pd.Timestamp(buffer.last_timestamp),
+                     **dict(zip(CHANNELS, buffer.totals)), "grid_today_kWh": buffer.grid_today,
+                     "projected_grid_kWh": buffer.projected_grid(), "alert": buffer.alerted_day == buffer.day}
+                    for unit, buffer in self.units.items()]
+        return pd.DataFrame(rows)
+
+    def history(self, unit):
+        with self.lock:
+            return self.units[unit].history()
+
+
+def _timestamp_ns(value):
+    return pd.Timestamp(value).value
+
+def _readings(df, unit):
+    timestamps = pd.to_datetime(df["timestamp"]).to_numpy("datetime64[ns]").astype(np.int64)
+    units = df["unit"].astype(str).tolist() if "unit" in df.columns else [unit] * len(df)
+    values = df[CHANNELS].to_numpy(np.float64)
+    return [(u, int(t), *row) for u, t, row in zip(units, timestamps, values.tolist())]
+
+
+# Sources: async generators yielding batches of readings
+
+# Replay the generator's output for `units` sites, one batch per 15-minute step
+async def stub_feed(units=10, start="2020-01-01", days=1, seed=0, step_seconds=0.0):
+    from addingnoise import generate_energy_data
+
+    end = pd.Timestamp(start) + pd.Timedelta(days=days) - pd.Timedelta(NS_PER_INTERVAL, unit="ns")
+    seeds = np.random.SeedSequence(seed).spawn(units)
+    sites = [_readings(generate_energy_data(start, end, seed=child), f"unit-{i}") for i, child in enumerate(seeds)]
+    for step in zip(*sites):
+        yield list(step)
+        await asyncio.sleep(step_seconds)
+
+# Read CSV files in the dataset's format (optionally with a `unit` column; otherwise
+# the file name is the unit) in chunks, off the event loop
+async def file_feed(paths, chunk_rows=10_000):
+    for path in paths:
+        dtype = {column: SCHEMA[column] for column in CHANNELS}
+        reader = pd.read_csv(path, usecols=lambda c: c in ("unit", "timestamp", *CHANNELS), dtype=dtype,
+                             chunksize=chunk_rows)
+        while True:
+            chunk = await asyncio.to_thread(next, reader, None)
+            if chunk is None:
+                break
+            yield _readings(chunk, Path(path).stem)
+
+# Accept newline-delimited JSON readings on a local TCP socket, e.g.
+# {"unit": "pen-1", "timestamp": "2020-01-01 00:15", "energy_consumed_kWh": 1.2, ...}
+async def serve_socket(ingestor, host="127.0.0.1", port=8765, read_bytes=1 << 16):
+    async def submit_lines(lines):
+        batch = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                reading = json.loads(line)
+                batch.append((str(reading["unit"]), _timestamp_ns(reading["timestamp"]),
+                              *(float(reading[column]) for column in CHANNELS)))
+            except (ValueError, KeyError, TypeError):
+                ingestor.reject()
+        if batch:
+            await ingestor.submit(batch)
+
+    async def handle(reader, writer):
+        pending = b""
+        while data := await reader.read(read_bytes):
+            # Every complete line received so far goes to the queue as one batch
+            lines = (pending + data).split(b"\n")
+            pending = lines.pop()
+            await submit_lines(lines)
+        # A last line without a trailing newline is still a reading
+        await submit_lines([pending])
+        writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+# Runs an Ingestor and its sources on a background event loop thread, so synchronous
+# callers such as the Streamlit dashboards can read summaries and histories
+class IngestionService:
+    def __init__(self, ingestor=None):
+        self.ingestor = ingestor or Ingestor()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="ingestion", daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._start_worker(), self.loop).result()
+
+    async def _start_worker(self):
+        self.worker = asyncio.ensure_future(self.ingestor.run())
+        await asyncio.sleep(0)
+
+    def add_source(self, source):
+        return asyncio.run_coroutine_threadsafe(self.ingestor.consume(source), self.loop)
+
+    def serve_socket(self, host="127.0.0.1", port=8765):
+        return asyncio.run_coroutine_threadsafe(serve_socket(self.ingestor, host, port), self.loop).result()
+
+# Service with the feeds configured by the INGEST_* variables
+def start_service(sources=None):
+    service = IngestionService()
+    for source in sources or INGEST_SOURCES:
+        if source == "stub":
+            service.add_source(stub_feed(INGEST_UNITS, days=7, step_seconds=INGEST_STEP_SECONDS))
+        elif source == "socket":
+            service.serve_socket(port=INGEST_PORT)
+        else:
+            raise ValueError(f"Unknown ingestion source: {source}")
+    return service
+
+
+async def _main(args):
+    ingestor = Ingestor(limit=args.limit, on_alert=lambda alert: print("ALERT", alert))
+    worker = asyncio.ensure_future(ingestor.run())
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    if args.source == "stub":
+        await ingestor.consume(stub_feed(args.units, args.start, args.days, args.seed))
+    elif args.source == "file":
+        await ingestor.consume(file_feed(args.paths))
+    else:
+        server = await serve_socket(ingestor, args.host, args.port)
+        print(f"Listening on {args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+    await ingestor.queue.join()
+    seconds = time.perf_counter() - started
+    worker.cancel()
+    print(ingestor.summary().to_string())
+    print(f"{ingestor.received:,} readings ({ingestor.rejected:,} rejected) in {seconds:.2f}s "
+          f"= {ingestor.received / seconds:,.0f} readings/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest live 15-minute readings and watch the production limit")
+    parser.add_argument("source", choices=["stub", "file", "socket"])
+    parser.add_argument("paths", nargs="*", help="CSV files for the file source")
+    parser.add_argument("--units", type=int, default=10)
+    parser.add_argument("--start", default="2020-01-01")
+    parser.add_argument("--days", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--limit", type=float, default=PRODUCTION_LIMIT_KWH, help="kWh of grid draw per day")
+    asyncio.run(_main(parser.parse_args()))
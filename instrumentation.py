@@ -0,0 +1,284 @@
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+logger = logging.getLogger("instrumentation")
+
+# Latency buckets (seconds) for the Prometheus stage histograms
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+# Serve /metrics from dashboard processes when set (e.g. METRICS_PORT=9108)
+METRICS_PORT = os.environ.get("METRICS_PORT")
+# Interface the metrics server binds to; loopback unless exposed on purpose (e.g. 0.0.0.0)
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+
+METRIC_PREFIX = "jsw"
+
+
+# Process-wide metrics: per-stage latency histograms and labelled counters. Shared by
+# every Streamlit session and rerun in the process, so updates are locked.
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}  # stage -> {"count", "sum", "max", "buckets"}
+        self.counters = {}  # (name, sorted label items) -> value
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            entry = self.stages.setdefault(stage, {"count": 0, "sum": 0.0, "max": 0.0,
+                                                   "buckets": [0] * len(LATENCY_BUCKETS)})
+            entry["count"] += 1
+            entry["sum"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    entry["buckets"][i] += 1
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self):
+        with self.lock:
+            stages = {stage: {**entry, "buckets": list(entry["buckets"])} for stage, entry in self.stages.items()}
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in self.counters.items()]
+        return {"stages": stages, "counters": counters}
+
+    def reset(self):
+        with self.lock:
+            self.stages.clear()
+            self.counters.clear()
+
+METRICS = Metrics()
+
+
+# Size in bytes of a payload (frame, array, bytes or anything JSON-serializable)
+def payload_size(obj):
+    if hasattr(obj, "memory_usage"):
+        usage = obj.memory_usage(index=False)
+        return int(np.sum(usage))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return len(obj)
+    return len(json.dumps(obj, default=str).encode())
+
+
+# The rerun (or request) in progress on this thread: its stages and profiler
+_current = threading.local()
+
+def _run():
+    return getattr(_current, "run", None)
+
+
+class Stage:
+    def __init__(self, name, rows=None, payload=None):
+        self.name = name
+        self.rows = rows
+        self.bytes = payload_size(payload) if payload is not None else None
+        self.seconds = None
+
+    def as_dict(self):
+        return {"stage": self.name, "seconds": self.seconds, "rows": self.rows, "bytes": self.bytes}
+
+
+# Time a block or function as a named stage, e.g. `with timed("predict", rows=len(X)):`
+# or `@timed("fetch_weather")`. Rows and payload bytes may also be set on the yielded
+# stage inside the block. Results go to METRICS and to the current run, if any.
+class timed(contextlib.ContextDecorator):
+    def __init__(self, name, rows=None, payload=None):
+        self.name = name
+        self.rows = rows
+        self.payload = payload
+
+    def __enter__(self):
+        self.stage = Stage(self.name, self.rows, self.payload)
+        self.started = time.perf_counter()
+        return self.stage
+
+    def __exit__(self, *exc):
+        stage = self.stage
+        stage.seconds = time.perf_counter() - self.started
+        METRICS.observe(stage.name, stage.seconds)
+        if stage.rows is not None:
+            METRICS.count("rows_processed_total", stage.rows, stage=stage.name)
+        if stage.bytes is not None:
+            METRICS.count("payload_bytes_total", stage.bytes, stage=stage.name)
+        run = _run()
+        if run is not None:
+            run["stages"].append(stage.as_dict())
+        return False
+
+
+# Wrap a Streamlit cache decorator so cache requests and misses are counted (the
+# function body only runs on a miss):
+#     @tracked_cache(st.cache_resource(max_entries=1), "load_data")
+def tracked_cache(cache, name):
+    def decorate(fn):
+        @functools.wraps(fn)
+        def compute(*args, **kwargs):
+            METRICS.count("cache_misses_total", cache=name)
+            with timed(name):
+                return fn(*args, **kwargs)
+        cached = cache(compute)
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            METRICS.count("cache_requests_total", cache=name)
+            return cached(*args, **kwargs)
+        call.clear = cached.clear
+        return call
+    return decorate
+
+
+def _start_profiler(kind):
+    if kind == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning("pyinstrument is not installed; using cProfile")
+        else:
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+def _stop_profiler(profiler, limit=30):
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+    profiler.stop()
+    return profiler.output_text()
+
+
+# Begin collecting stages for one rerun of `page`; `profiler` is None, "cprofile" or
+# "pyinstrument"
+def start_run(page, profiler=None):
+    previous = _run()
+    if previous is not None and previous["profiler"] is not None:
+        _stop_profiler(previous["profiler"])
+    if METRICS_PORT:
+        serve_metrics(int(METRICS_PORT), METRICS_HOST)
+    METRICS.count("reruns_total", page=page)
+    _current.run = {"page": page, "started": time.perf_counter(), "stages": [],
+                    "profiler": _start_profiler(profiler) if profiler else None}
+
+# End the current run: total time is recorded as the "<page>_rerun" stage and the run
+# is logged as one JSON line. Returns the run summary (with profile text, if any).
+def finish_run():
+    run = _run()
+    if run is None:
+        return None
+    _current.run = None
+    total = time.perf_counter() - run["started"]
+    METRICS.observe(f"{run['page']}_rerun", total)
+    summary = {"page": run["page"], "seconds": total, "stages": run["stages"]}
+    logger.info(json.dumps(summary))
+    if run["profiler"] is not None:
+        summary["profile"] = _stop_profiler(run["profiler"])
+    return summary
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in sorted(labels.items())) + "}"
+
+# All metrics in the Prometheus text exposition format
+def prometheus_text(snapshot=None):
+    snapshot = snapshot or METRICS.snapshot()
+    name = f"{METRIC_PREFIX}_stage_seconds"
+    lines = [f"# HELP {name} Wall-clock time per instrumented stage", f"# TYPE {name} histogram"]
+    for stage, entry in sorted(snapshot["stages"].items()):
+        for bound, count in zip(LATENCY_BUCKETS, entry["buckets"]):
+            lines.append(f"{name}_bucket{_labels({'stage': stage, 'le': bound})} {count}")
+        lines.append(f"{name}_bucket{_labels({'stage': stage, 'le': '+Inf'})} {entry['count']}")
+        lines.append(f"{name}_sum{_labels({'stage': stage})} {entry['sum']}")
+        lines.append(f"{name}_count{_labels({'stage': stage})} {entry['count']}")
+    seen = set()
+    for counter in sorted(snapshot["counters"], key=lambda c: c["name"]):
+        name = f"{METRIC_PREFIX}_{counter['name']}"
+        if name not in seen:
+            lines.append(f"# TYPE {name} counter")
+            seen.add(name)
+        lines.append(f"{name}{_labels(counter['labels'])} {counter['value']}")
+    return "\n".join(lines) + "\n"
+
+# Metrics as JSON, with cache hits derived from requests and misses
+def metrics_json(snapshot=None):
+    snapshot = snapshot or METRICS.snapshot()
+    caches = {}
+    for counter in snapshot["counters"]:
+        if counter["name"] in ("cache_requests_total", "cache_misses_total"):
+            entry = caches.setdefault(counter["labels"]["cache"], {"requests": 0, "misses": 0})
+            entry["requests" if counter["name"] == "cache_requests_total" else "misses"] += counter["value"]
+    for entry in caches.values():
+        entry["hits"] = entry["requests"] - entry["misses"]
+    return json.dumps({**snapshot, "caches": caches}, indent=2)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+_server = None
+
+# Expose prometheus_text() over HTTP from a background thread (once per process)
+def serve_metrics(port, host=METRICS_HOST):
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
+
+
+# Streamlit helpers (streamlit is imported lazily so the API can use this module)
+def start_page(page):
+    import streamlit as st
+
+    with st.sidebar.expander("🐞 Debug"):
+        profile = st.toggle("Profile this rerun", key=f"_profile_{page}")
+        kind = st.radio("Profiler", ["cprofile", "pyinstrument"], horizontal=True, key=f"_profiler_{page}")
+    start_run(page, kind if profile else None)
+
+# Sidebar panel with this rerun's stage timings, process-wide metrics and exports
+def debug_panel(summary):
+    import pandas as pd
+    import streamlit as st
+
+    if summary is None:
+        return
+    with st.sidebar.expander(f"⏱️ {summary['page']} rerun: {summary['seconds'] * 1000:.0f} ms"):
+        if summary["stages"]:
+            stages = pd.DataFrame(summary["stages"])
+            stages["ms"] = stages.pop("seconds") * 1000
+            st.dataframe(stages, hide_index=True)
+        snapshot = METRICS.snapshot()
+        st.download_button("Prometheus metrics", prometheus_text(snapshot), "metrics.prom", "text/plain")
+        st.download_button("JSON metrics", metrics_json(snapshot), "metrics.json", "application/json")
+        if "profile" in summary:
+            st.code(summary["profile"], language="text")
@@ -0,0 +1,43 @@
+import streamlit as st
+import plotly.graph_objects as go
+from ingestion import INGEST_SOURCES, start_service
+from instrumentation import debug_panel, finish_run, start_page, timed, tracked_cache
+
+start_page("live")
+
+# One ingestion service per server process, shared by every session; its buffers are
+# read here instead of re-scanning files (configure feeds with INGEST_SOURCES)
+@tracked_cache(st.cache_resource(show_spinner="Starting ingestion..."), "ingestion_service")
+def get_service():
+    return start_service()
+
+ingestor = get_service().ingestor
+st.title("📡 Live Ingestion & Daily Budget")
+st.caption(f"Sources: {', '.join(INGEST_SOURCES)}. Alerts fire when a unit's projected grid draw for the day "
+           f"exceeds {ingestor.limit:,.0f} kWh.")
+if st.button("Refresh"):
+    st.rerun()
+
+with timed("live_summary") as stage:
+    summary = ingestor.summary()
+    stage.rows = len(summary)
+if summary.empty:
+    st.info("Waiting for readings...")
+else:
+    st.write(f"### Units ({ingestor.received:,} readings, {ingestor.rejected:,} rejected)")
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+    if ingestor.alerts:
+        st.write("### Projected Overrun Alerts")
+        st.dataframe(list(ingestor.alerts)[::-1], use_container_width=True, hide_index=True)
+    unit = st.selectbox("Unit", summary["unit"])
+    with timed("live_chart"):
+        history = ingestor.history(unit)
+        fig = go.Figure()
+        for column, name in [("energy_consumed_kWh", "Consumed"), ("solar_energy_kWh", "Solar"),
+                             ("wind_energy_kWh", "Wind"), ("hydro_energy_kWh", "Hydro"), ("grid_kWh", "Grid")]:
+            fig.add_trace(go.Scatter(x=history.index, y=history[column], mode="lines", name=name))
+        fig.update_layout(title=f"Last {len(history)} intervals of {unit}", xaxis_title="Time",
+                          yaxis_title="Energy per interval (kWh)", template="plotly_dark")
+        st.plotly_chart(fig, use_container_width=True)
+
+debug_panel(finish_run())
@@ -1,53 +1,98 @@
-import streamlit as st
-import os
-
-# Sidebar for navigation between apps
-st.sidebar.image(r"jsw energy logo.png", use_container_width=True)
-st.sidebar.title("Navigation")
-app_options = ["Main Application", "App", "AppAPI"]
-selected_app = st.sidebar.selectbox("Choose Application", app_options)
-
 import streamlit as st
 import pandas as pd
 import numpy as np
-import seaborn as sns
-from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestRegressor
 import plotly.graph_objects as go
 import plotly.express as px
 from sklearn.metrics import mean_squared_error, r2_score
+from dataset import FEATURES, TARGET, select_until
+from backends import DATA_BACKEND, DATA_SOURCE, make_backend, source_fingerprint, source_hash
+from model_registry import load_model, registered_model_key, train_and_register
+from compiled_forest import INFERENCE_BACKEND, load_compiled
+from downsample import aggregate_to, series_for_plot
+from analytics import (SAMPLE_SIZE, box_figure, correlation_figure, energy_pairplot_figure, histogram_figure,
+                       summarize_range)
+from instrumentation import debug_panel, finish_run, start_page, timed, tracked_cache
+
+# Per-stage timings for this rerun (see instrumentation.py)
+start_page("main")
+
+# Open the dataset once through the configured backend (see backends.py). The pandas
+# default loads the CSV into one frame indexed by timestamp, shared across reruns and
+# sessions (treat it as read-only); the Parquet backends only read the partitions a
+# query needs. Reopened when the source's fingerprint (mtime, size) changes.
+@tracked_cache(st.cache_resource(show_spinner="Loading dataset...", max_entries=1), "load_data")
+def load_backend(name, source, fingerprint):
+    return make_backend(name, source)
+
+fingerprint = source_fingerprint(DATA_SOURCE)
+backend = load_backend(DATA_BACKEND, DATA_SOURCE, fingerprint)
 
-# Load the dataset
-df = pd.read_csv("energy_data_with_noise.csv")
+# First and last timestamp of the dataset, for the date pickers
+@tracked_cache(st.cache_data(max_entries=1), "date_bounds")
+def load_date_bounds(name, source, fingerprint):
+    return load_backend(name, source, fingerprint).date_bounds()
 
-# Convert 'timestamp' to datetime and extract features
-df['timestamp'] = pd.to_datetime(df['timestamp'])
-df['hour'] = df['timestamp'].dt.hour
-df['minute'] = df['timestamp'].dt.minute
-df['day'] = df['timestamp'].dt.day
+# Hourly/daily/weekly rollups of the plotted columns, built once per dataset
+@tracked_cache(st.cache_resource(max_entries=1), "load_rollups")
+def load_rollups(name, source, fingerprint):
+    return load_backend(name, source, fingerprint).rollups()
+
+# Correlations, histogram, box-plot statistics and scatter sample for one range
+@tracked_cache(st.cache_data(max_entries=32), "load_range_summary")
+def load_range_summary(name, source, fingerprint, start_date, end_date, sample_size):
+    return summarize_range(load_backend(name, source, fingerprint).load_range(start_date, end_date), sample_size)
+
+# Content hash of the dataset, recomputed only when the source changes
+@tracked_cache(st.cache_data, "data_hash")
+def data_hash(source, fingerprint):
+    return source_hash(source)
+
+# Key of the registered model for this dataset (see registered_model_key). Models are
+# trained offline with `python model_registry.py train`; if none is registered yet, one
+# with the default hyperparameters is trained once per process when the page loads,
+# never inside the Run Prediction handler, and without moving the latest.json pointer.
+@tracked_cache(st.cache_resource(show_spinner="Training a model for this dataset..."), "ensure_model")
+def ensure_model(data_hash_value):
+    key = registered_model_key(data_hash_value)
+    if key is None:
+        key = train_and_register(DATA_SOURCE, df=backend.load_range(columns=FEATURES + [TARGET]))
+    return key
+
+# Trained scaler+model pipeline, loaded once per process
+@tracked_cache(st.cache_resource(show_spinner="Loading model..."), "get_model")
+def get_model(key):
+    # INFERENCE_BACKEND=compiled scores with the flattened forest (same predictions, no sklearn overhead)
+    return load_compiled(key) if INFERENCE_BACKEND == "compiled" else load_model(key)[0]
 # Streamlit App Title
 st.title("Energy Consumption Prediction")
+# Make sure a model exists before any prediction is requested
+data_hash_value = data_hash(DATA_SOURCE, fingerprint)
+if registered_model_key(data_hash_value) is None:
+    st.info("No trained model is registered for this dataset yet, so one is trained now. "
+            "Run `python model_registry.py train` to train it offline instead.")
+key = ensure_model(data_hash_value)
 # Date range input for user to select the range of analysis
 st.write("### Select Date Range for Analysis")
-start_date = st.date_input("Start Date", df['timestamp'].min().date())
-end_date = st.date_input("End Date", df['timestamp'].max().date())
+first, last = load_date_bounds(DATA_BACKEND, DATA_SOURCE, fingerprint)
+start_date = st.date_input("Start Date", first.date())
+end_date = st.date_input("End Date", last.date())
+sample_size = st.number_input("Rows sampled for scatter plots", min_value=500, max_value=100_000, value=SAMPLE_SIZE, step=500)
 # Run button
 run_button = st.button("Run Prediction")
 # Prediction logic after clicking the "Run" button
 if run_button:
     # Filter data according to the selected date range
-    filtered_df = df[(df['timestamp'].dt.date >= start_date) & (df['timestamp'].dt.date <= end_date)]
+    with timed("filter") as stage:
+        filtered_df = backend.load_range(start_date, end_date)
+        stage.rows = len(filtered_df)
     # Features and target variable
-    X = filtered_df[['temperature_C', 'humidity_%', 'wind_speed_mps', 'is_sunny', 'cloud_cover_%', 'solar_irradiance_Wm2', 'air_density_kgm3', 'precipitation_mm', 'runoff_coefficient', 'hour', 'minute', 'day']]
-    y = filtered_df['energy_consumed_kWh']
-    # Standardize the features
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    # Model training (RandomForestRegressor)
-    model = RandomForestRegressor(n_estimators=2, random_state=42, max_depth=3)
-    model.fit(X_scaled, y)
+    X = filtered_df[FEATURES]
+    y = filtered_df[TARGET]
+    # Registered pipeline (StandardScaler + RandomForestRegressor); only inference runs here
+    model = get_model(key)
     # Predictions on the filtered dataset
-    y_pred = model.predict(X_scaled)
+    with timed("predict", rows=len(X), payload=X):
+        y_pred = model.predict(X)
     # Performance metrics
     r2 = r2_score(y, y_pred)
     mse = mean_squared_error(y, y_pred)
@@ -55,115 +100,92 @@ if run_button:
     st.write("### Model Performance")
     st.write(f'R² Score: {r2:.4f}')
     st.write(f'Mean Squared Error: {mse:.4f}')
-    # Plotting Actual vs Predicted Energy Consumption using Plotly
-    fig = go.Figure()
-    # Filter data to exclude future dates for actual values
-    filtered_df_valid = filtered_df[filtered_df['timestamp'] <= pd.Timestamp.now()]
-    # Actual Energy Consumption
-    fig.add_trace(go.Scatter(
-        x=filtered_df_valid['timestamp'], 
-        y=filtered_df_valid['energy_consumed_kWh'], 
-        mode='lines+markers', 
-        name='Actual Energy Consumption', 
-        line=dict(color='blue')
-    ))
-    # Predicted Energy Consumption (for all timestamps)
-    fig.add_trace(go.Scatter(
-        x=filtered_df['timestamp'], 
-        y=y_pred, 
-        mode='lines+markers', 
-        name='Predicted Energy Consumption', 
-        line=dict(color='red')
-    ))
-    # Update the layout for the x-axis to show 15-minute intervals and increase graph size
-    fig.update_layout(
-        title="Actual vs Predicted Energy Consumption",
-        xaxis_title="Time of Day",
-        yaxis_title="Energy Consumption (kWh)",
-        legend_title="Legend",
-        template="plotly_dark",
-        xaxis=dict(
-            tickformat="%H:%M",
-            tickmode="linear",
-            tickangle=45,
-            dtick=900000000,
-            range=[filtered_df['timestamp'].iloc[0], filtered_df['timestamp'].iloc[-1]]
-        ),
-        autosize=True
-    )
-    # Make the graph occupy more space in Streamlit
-    st.plotly_chart(fig, use_container_width=True)
-    # First, display the correlation matrix using a heatmap
-    st.write("### Correlation Heatmap of Features")
-    correlation_matrix = filtered_df.corr()
-    heatmap = px.imshow(correlation_matrix, text_auto=True, color_continuous_scale='Blues', title="Correlation Heatmap")
-    st.plotly_chart(heatmap, use_container_width=True)
-    # Second, show the distribution of energy consumed
-    st.write("### Distribution of Energy Consumed (kWh)")
-    fig1 = px.histogram(filtered_df, x='energy_consumed_kWh', nbins=20, title="Energy Consumption Distribution")
-    st.plotly_chart(fig1, use_container_width=True)
-    # Third, scatter plot between Temperature and Energy Consumption with hue (Sunny or Not)
-    st.write("### Scatter Plot: Temperature vs Energy Consumption (Hue: Sunny or Not)")
-    fig2 = px.scatter(filtered_df, x='temperature_C', y='energy_consumed_kWh', color='is_sunny', title="Temperature vs Energy Consumption",
-                    labels={"temperature_C": "Temperature (°C)", "energy_consumed_kWh": "Energy Consumed (kWh)", "is_sunny": "Sunny (0 = No, 1 = Yes)"})
-    st.plotly_chart(fig2, use_container_width=True)
-    # New: Scatter plot between Solar Energy and Energy Consumption with Hue based on Cloud Cover
-    st.write("### Scatter Plot: Solar Energy vs Energy Consumption (Hue: Cloud Cover Percentage)")
-    fig3 = px.scatter(
-        filtered_df, 
-        x='solar_energy_kWh', 
-        y='energy_consumed_kWh', 
-        title="Solar Energy vs Energy Consumption",
-        labels={"solar_energy_kWh": "Solar Energy (kWh)", "energy_consumed_kWh": "Energy Consumed (kWh)"},
-        color='cloud_cover_%',  # Set the hue to 'cloud_cover_%'
-        color_continuous_scale='Viridis'  # Optional: Adds a color scale
-    )
-    st.plotly_chart(fig3, use_container_width=True)
-    # Normalize the values in the selected columns
-    scaler = StandardScaler()
-    normalized_data = scaler.fit_transform(filtered_df[['solar_energy_kWh', 'wind_energy_kWh', 'hydro_energy_kWh']])
-    # Create a new DataFrame with normalized values
-    normalized_df = pd.DataFrame(normalized_data, columns=['solar_energy_kWh', 'wind_energy_kWh', 'hydro_energy_kWh'])
-    # Plot KDE Pairplot
-    st.write("### Pairplot: Solar Energy, Wind Energy, and Hydro Energy (Normalized with Shading and Hue)")
-    # Add a hue column based on cloud_cover_% (e.g., categorize into "Low", "Medium", "High")
-    filtered_df['cloud_cover_category'] = pd.cut(
-        filtered_df['cloud_cover_%'], bins=[0, 33, 66, 100], labels=["Low", "Medium", "High"]
-    )
-    # Select relevant columns and normalize values
-    pairplot_data = filtered_df[['solar_energy_kWh', 'wind_energy_kWh', 'hydro_energy_kWh', 'cloud_cover_category']].dropna()
-    normalized_pairplot_data = pairplot_data.copy()
-    for col in ['solar_energy_kWh', 'wind_energy_kWh', 'hydro_energy_kWh']:
-        normalized_pairplot_data[col] = (pairplot_data[col] - pairplot_data[col].min()) / (pairplot_data[col].max() - pairplot_data[col].min())
-    # Create a pairplot with hue and shading
-    sns.set(style="darkgrid")
-    pairplot_fig = sns.pairplot(
-        normalized_pairplot_data,
-        hue='cloud_cover_category',
-        palette='viridis'
-    )
-    pairplot_fig.map_lower(sns.kdeplot, levels=3, shade=True)
-    # Display the plot in Streamlit
-    st.pyplot(pairplot_fig)
-    # Sixth, box plot to show the spread of Energy Consumption based on the 'is_sunny' feature
-    st.write("### Box Plot: Energy Consumption Based on Weather (Sunny or Not)")
-    fig7 = px.box(filtered_df, x='is_sunny', y='energy_consumed_kWh', title="Energy Consumption Based on Weather (Sunny or Not)", 
-                labels={"is_sunny": "Sunny (0 = No, 1 = Yes)", "energy_consumed_kWh": "Energy Consumed (kWh)"})
-    st.plotly_chart(fig7, use_container_width=True)
-    # Seventh, line plot to visualize the change in solar irradiance over time
-    st.write("### Line Plot: Solar Irradiance Over Time")
-    fig8 = go.Figure()
-    fig8.add_trace(go.Scatter(x=filtered_df['timestamp'], y=filtered_df['solar_irradiance_Wm2'], mode='lines', name='Solar Irradiance', line=dict(color='green')))
-    fig8.update_layout(title="Solar Irradiance over Time", xaxis_title="Time", yaxis_title="Solar Irradiance (W/m²)", template="plotly_dark")
-    st.plotly_chart(fig8, use_container_width=True)
-
-if st.sidebar.button("Go to Selected App"):
-    if selected_app == "Main Application":
-        os.system("streamlit run main.py")
-    elif selected_app == "App":
-        os.system("streamlit run app.py")  # Redirect to app.py
-    elif selected_app == "AppAPI":
-        os.system("streamlit run appapi.py")  # Redirect to appapi.py
-    
-
+    # Plotting Actual vs Predicted Energy Consumption using Plotly. Long ranges are
+    # drawn from hourly/daily/weekly means so each trace stays within MAX_POINTS.
+    rollups = load_rollups(DATA_BACKEND, DATA_SOURCE, fingerprint)
+    with timed("prediction_chart"):
+        fig = go.Figure()
+        # Filter data to exclude future dates for actual values
+        filtered_df_valid = select_until(filtered_df, pd.Timestamp.now())
+        actual_x, actual_y, resolution = series_for_plot(filtered_df_valid, 'energy_consumed_kWh', rollups)
+        predicted_x, predicted_y = aggregate_to(filtered_df.index, y_pred, resolution)
+        mode = 'lines+markers' if resolution is None else 'lines'
+        # Actual Energy Consumption
+        fig.add_trace(go.Scatter(
+            x=actual_x, 
+            y=actual_y, 
+            mode=mode, 
+            name='Actual Energy Consumption', 
+            line=dict(color='blue')
+        ))
+        # Predicted Energy Consumption (for all timestamps)
+        fig.add_trace(go.Scatter(
+            x=predicted_x, 
+            y=predicted_y, 
+            mode=mode, 
+            name='Predicted Energy Consumption', 
+            line=dict(color='red')
+        ))
+        # Update the layout for the x-axis and increase graph size; 15-minute ticks are
+        # only used when the raw intervals are shown
+        xaxis = dict(range=[filtered_df['timestamp'].iloc[0], filtered_df['timestamp'].iloc[-1]])
+        if resolution is None:
+            xaxis.update(tickformat="%H:%M", tickmode="linear", tickangle=45, dtick=900000000)
+        fig.update_layout(
+            title="Actual vs Predicted Energy Consumption" + ("" if resolution is None else f" ({resolution} mean)"),
+            xaxis_title="Time of Day" if resolution is None else "Time",
+            yaxis_title="Energy Consumption (kWh)",
+            legend_title="Legend",
+            template="plotly_dark",
+            xaxis=xaxis,
+            autosize=True
+        )
+        # Make the graph occupy more space in Streamlit
+        st.plotly_chart(fig, use_container_width=True)
+    with timed("statistical_charts"):
+        # Statistical plots are computed from streaming statistics over the whole range and
+        # a stratified sample for scatter plots, cached per (dataset, range, sample size)
+        summary = load_range_summary(DATA_BACKEND, DATA_SOURCE, fingerprint, start_date, end_date, sample_size)
+        sample_df = summary["sample"]
+        # First, display the correlation matrix using a heatmap
+        st.write("### Correlation Heatmap of Features")
+        heatmap = correlation_figure(summary)
+        st.plotly_chart(heatmap, use_container_width=True)
+        # Second, show the distribution of energy consumed
+        st.write("### Distribution of Energy Consumed (kWh)")
+        fig1 = histogram_figure(summary)
+        st.plotly_chart(fig1, use_container_width=True)
+        # Third, scatter plot between Temperature and Energy Consumption with hue (Sunny or Not)
+        st.write("### Scatter Plot: Temperature vs Energy Consumption (Hue: Sunny or Not)")
+        fig2 = px.scatter(sample_df, x='temperature_C', y='energy_consumed_kWh', color='is_sunny', title="Temperature vs Energy Consumption",
+                        labels={"temperature_C": "Temperature (°C)", "energy_consumed_kWh": "Energy Consumed (kWh)", "is_sunny": "Sunny (0 = No, 1 = Yes)"})
+        st.plotly_chart(fig2, use_container_width=True)
+        # New: Scatter plot between Solar Energy and Energy Consumption with Hue based on Cloud Cover
+        st.write("### Scatter Plot: Solar Energy vs Energy Consumption (Hue: Cloud Cover Percentage)")
+        fig3 = px.scatter(
+            sample_df, 
+            x='solar_energy_kWh', 
+            y='energy_consumed_kWh', 
+            title="Solar Energy vs Energy Consumption",
+            labels={"solar_energy_kWh": "Solar Energy (kWh)", "energy_consumed_kWh": "Energy Consumed (kWh)"},
+            color='cloud_cover_%',  # Set the hue to 'cloud_cover_%'
+            color_continuous_scale='Viridis'  # Optional: Adds a color scale
+        )
+        st.plotly_chart(fig3, use_container_width=True)
+        # Pairplot of the normalized energy columns, with hue by cloud cover category ("Low", "Medium", "High")
+        st.write("### Pairplot: Solar Energy, Wind Energy, and Hydro Energy (Normalized with Hue)")
+        pairplot_fig = energy_pairplot_figure(summary)
+        st.plotly_chart(pairplot_fig, use_container_width=True)
+        # Sixth, box plot to show the spread of Energy Consumption based on the 'is_sunny' feature
+        st.write("### Box Plot: Energy Consumption Based on Weather (Sunny or Not)")
+        fig7 = box_figure(summary, "Energy Consumption Based on Weather (Sunny or Not)", "Sunny (0 = No, 1 = Yes)", "Energy Consumed (kWh)")
+        st.plotly_chart(fig7, use_container_width=True)
+        # Seventh, line plot to visualize the change in solar irradiance over time
+        st.write("### Line Plot: Solar Irradiance Over Time")
+        irradiance_x, irradiance_y, _ = series_for_plot(filtered_df, 'solar_irradiance_Wm2', rollups)
+        fig8 = go.Figure()
+        fig8.add_trace(go.Scatter(x=irradiance_x, y=irradiance_y, mode='lines', name='Solar Irradiance', line=dict(color='green')))
+        fig8.update_layout(title="Solar Irradiance over Time", xaxis_title="Time", yaxis_title="Solar Irradiance (W/m²)", template="plotly_dark")
+        st.plotly_chart(fig8, use_container_width=True)
 
+debug_panel(finish_run())
@@ -0,0 +1,125 @@
+import argparse
+import functools
+import hashlib
+import json
+import time
+from pathlib import Path
+
+import joblib
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from dataset import DATA_PATH, FEATURES, TARGET, dataset_hash, load_energy_data, prepare_energy_data
+
+# Directory holding <key>.joblib pipelines and their <key>.json metadata
+MODEL_DIR = "models"
+
+# Hyperparameters of the RandomForestRegressor used by the dashboard
+DEFAULT_PARAMS = {"n_estimators": 2, "max_depth": 3, "random_state": 42}
+
+
+# A model is identified by the data it was trained on, its inputs and its hyperparameters
+def model_key(data_hash, features=FEATURES, params=DEFAULT_PARAMS):
+    spec = json.dumps({"data": data_hash, "features": list(features), "params": params}, sort_keys=True)
+    return hashlib.sha256(spec.encode()).hexdigest()[:16]
+
+def build_pipeline(params=DEFAULT_PARAMS):
+    return make_pipeline(StandardScaler(), RandomForestRegressor(**params))
+
+def train_model(df, features=FEATURES, params=DEFAULT_PARAMS):
+    pipeline = build_pipeline(params)
+    pipeline.fit(df[list(features)], df[TARGET])
+    return pipeline
+
+def _paths(key, model_dir):
+    model_dir = Path(model_dir)
+    return model_dir / f"{key}.joblib", model_dir / f"{key}.json"
+
+# `update_latest` moves the latest.json pointer that api.py and compiled_forest.py serve
+# from; only an explicit `python model_registry.py train` does that, so a model the
+# dashboard registers on its own never replaces the one being served
+def save_model(pipeline, key, metadata, model_dir=MODEL_DIR, update_latest=False):
+    model_path, metadata_path = _paths(key, model_dir)
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(pipeline, model_path)
+    metadata_path.write_text(json.dumps({"key": key, **metadata}, indent=2))
+    if update_latest:
+        # Pointer used by consumers that just want the most recently trained model
+        (Path(model_dir) / "latest.json").write_text(json.dumps({"key": key}))
+    return model_path
+
+def has_model(key, model_dir=MODEL_DIR):
+    return _paths(key, model_dir)[0].exists()
+
+# Loaded pipelines are memoized per process, so repeated lookups cost nothing
+@functools.lru_cache(maxsize=8)
+def load_model(key, model_dir=MODEL_DIR):
+    model_path, metadata_path = _paths(key, model_dir)
+    return joblib.load(model_path), json.loads(metadata_path.read_text())
+
+def latest_model_key(model_dir=MODEL_DIR):
+    pointer = Path(model_dir) / "latest.json"
+    if not pointer.exists():
+        return None
+    return json.loads(pointer.read_text())["key"]
+
+# Registered model for a dataset: the one with the default hyperparameters, else the
+# latest model if it was trained on the same data, else None
+def registered_model_key(data_hash, features=FEATURES, model_dir=MODEL_DIR):
+    key = model_key(data_hash, features)
+    if has_model(key, model_dir):
+        return key
+    latest = latest_model_key(model_dir)
+    if latest is None or not has_model(latest, model_dir):
+        return None
+    metadata = json.loads(_paths(latest, model_dir)[1].read_text())
+    if metadata["data_hash"] == data_hash and metadata["features"] == list(features):
+        return latest
+    return None
+
+def list_models(model_dir=MODEL_DIR):
+    return [json.loads(path.read_text()) for path in sorted(Path(model_dir).glob("*.json")) if path.name != "latest.json"]
+
+# Train on the full dataset and register the result; returns the model key
+def train_and_register(data_path=DATA_PATH, features=FEATURES, params=DEFAULT_PARAMS, model_dir=MODEL_DIR, df=None,
+                       update_latest=False):
+    data_hash = dataset_hash(data_path)
+    key = model_key(data_hash, features, params)
+    if df is None:
+        df = prepare_energy_data(load_energy_data(data_path))
+    started = time.perf_counter()
+    pipeline = train_model(df, features, params)
+    metadata = {
+        "data_path": str(data_path),
+        "data_hash": data_hash,
+        "features": list(features),
+        "target": TARGET,
+        "params": params,
+        "rows": len(df),
+        "fit_seconds": round(time.perf_counter() - started, 3),
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    save_model(pipeline, key, metadata, model_dir, update_latest)
+    return key
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train and manage energy consumption models")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    train = commands.add_parser("train", help="Train on the full dataset and register the model")
+    train.add_argument("--data", default=DATA_PATH)
+    train.add_argument("--n-estimators", type=int, default=DEFAULT_PARAMS["n_estimators"])
+    train.add_argument("--max-depth", type=int, default=DEFAULT_PARAMS["max_depth"])
+    train.add_argument("--random-state", type=int, default=DEFAULT_PARAMS["random_state"])
+    commands.add_parser("list", help="List registered models")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        params = {"n_estimators": args.n_estimators, "max_depth": args.max_depth, "random_state": args.random_state}
+        key = train_and_register(args.data, params=params, model_dir=args.model_dir, update_latest=True)
+        print(f"Registered model {key} in {args.model_dir}")
+    else:
+        for metadata in list_models(args.model_dir):
+            print(metadata["key"], metadata["trained_at"], metadata["params"], metadata["rows"], "rows")
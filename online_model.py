@@ -0,0 +1,142 @@
+import argparse
+import copy
+import time
+from collections import deque
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import SGDRegressor
+from sklearn.preprocessing import StandardScaler
+
+from dataset import DATA_PATH, FEATURES, TARGET, add_time_features, load_energy_data
+
+ONLINE_MODEL_PATH = "models/online.joblib"
+
+# Forest: trees added per update, and the most trees kept (oldest dropped)
+TREES_PER_UPDATE = 2
+MAX_TREES = 50
+
+
+# Consumption model updated from new 15-minute readings as they arrive. Feature
+# scaling uses running mean/variance (StandardScaler.partial_fit) and the model is
+# either an SGDRegressor updated with partial_fit or a forest that grows a few
+# trees on each new batch. Each update costs time proportional to the batch only.
+# Forest trees keep frozen copies of the scalers from the update that trained them,
+# since the running scalers keep drifting afterwards.
+class OnlineConsumptionModel:
+    def __init__(self, kind="sgd", features=FEATURES, random_state=42):
+        if kind not in ("sgd", "forest"):
+            raise ValueError(f"Unknown model kind: {kind}")
+        self.kind = kind
+        self.features = list(features)
+        self.scaler = StandardScaler()
+        self.target_scaler = StandardScaler()
+        if kind == "sgd":
+            self.model = SGDRegressor(learning_rate="adaptive", eta0=0.01, random_state=random_state)
+        else:
+            # (feature scaler, target scaler, forest) per update, oldest first
+            self.model = deque(maxlen=MAX_TREES // TREES_PER_UPDATE)
+        self.random_state = random_state
+        self.updates = 0
+        self.rows_seen = 0
+        self.last_timestamp = None
+
+    def _features(self, batch):
+        if not set(self.features) <= set(batch.columns):
+            batch = add_time_features(batch.copy())
+        return batch[self.features].to_numpy(np.float64)
+
+    # Append a batch of readings (timestamp, weather columns and the target). Batches
+    # must be newer than everything ingested so far.
+    def ingest(self, batch):
+        if len(batch) == 0:
+            return 0
+        timestamps = batch["timestamp"]
+        if not timestamps.is_monotonic_increasing:
+            raise ValueError("Readings within a batch must be in time order")
+        if self.last_timestamp is not None and timestamps.iloc[0] <= self.last_timestamp:
+            raise ValueError(f"Readings must be newer than {self.last_timestamp}; got {timestamps.iloc[0]}")
+
+        X = self._features(batch)
+        y = batch[TARGET].to_numpy(np.float64).reshape(-1, 1)
+        self.scaler.partial_fit(X)
+        self.target_scaler.partial_fit(y)
+        if self.kind == "sgd":
+            self.model.partial_fit(self.scaler.transform(X), self.target_scaler.transform(y).ravel())
+        else:
+            self._grow_forest(X, y)
+        self.updates += 1
+        self.rows_seen += len(batch)
+        self.last_timestamp = timestamps.iloc[-1]
+        return len(batch)
+
+    def _grow_forest(self, X, y):
+        # New trees on the new batch only, seeded from the update counter so no seed is
+        # ever reused (the deque drops the oldest trees once MAX_TREES are kept)
+        scaler, target_scaler = copy.deepcopy(self.scaler), copy.deepcopy(self.target_scaler)
+        forest = RandomForestRegressor(n_estimators=TREES_PER_UPDATE, max_depth=8,
+                                       random_state=self.random_state + self.updates)
+        forest.fit(scaler.transform(X), target_scaler.transform(y).ravel())
+        self.model.append((scaler, target_scaler, forest))
+
+    def _predict_forest(self, X):
+        # Every update contributes the same number of trees, so this is the mean over
+        # trees. Trees are called directly (float32 input, as the forest would pass
+        # them) to skip the per-forest validation and thread pool.
+        predictions = []
+        for scaler, target_scaler, forest in self.model:
+            X_scaled = np.ascontiguousarray(scaler.transform(X), dtype=np.float32)
+            y_scaled = np.mean([tree.predict(X_scaled, check_input=False) for tree in forest.estimators_], axis=0)
+            predictions.append(target_scaler.inverse_transform(y_scaled.reshape(-1, 1)).ravel())
+        return np.mean(predictions, axis=0)
+
+    @property
+    def is_fitted(self):
+        return self.rows_seen > 0
+
+    def predict(self, batch):
+        X = self._features(batch)
+        if self.kind == "forest":
+            return self._predict_forest(X)
+        y_scaled = self.model.predict(self.scaler.transform(X)).reshape(-1, 1)
+        return self.target_scaler.inverse_transform(y_scaled).ravel()
+
+    def save(self, path=ONLINE_MODEL_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path=ONLINE_MODEL_PATH):
+        return joblib.load(path)
+
+
+# Replay a dataset in arrival order: score each batch before learning from it
+# (prequential evaluation), as a production feed would
+def replay(df, model, batch_rows=96):
+    errors = []
+    started = time.perf_counter()
+    for start in range(0, len(df), batch_rows):
+        batch = df.iloc[start:start + batch_rows]
+        if model.is_fitted:
+            errors.append(np.mean((model.predict(batch) - batch[TARGET].to_numpy()) ** 2))
+        model.ingest(batch)
+    return {"batches": len(errors) + 1, "rows": len(df), "seconds": time.perf_counter() - started,
+            "mse_first_10pct": float(np.mean(errors[:max(len(errors) // 10, 1)])),
+            "mse_last_10pct": float(np.mean(errors[-max(len(errors) // 10, 1):]))}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay the dataset through the online consumption model")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--kind", choices=["sgd", "forest"], default="sgd")
+    parser.add_argument("--batch-rows", type=int, default=96, help="Readings per update (96 = one day)")
+    parser.add_argument("--output", default=ONLINE_MODEL_PATH)
+    args = parser.parse_args()
+
+    df = load_energy_data(args.data)
+    model = OnlineConsumptionModel(args.kind)
+    print(pd.Series(replay(df, model, args.batch_rows)).to_string())
+    model.save(args.output)
@@ -0,0 +1,129 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Production limit: energy drawn on top of renewable generation in one period (a day
+# of 96 fifteen-minute intervals by default). Anything above it is fined.
+PRODUCTION_LIMIT_KWH = 300_000  # 300 MWh
+INTERVALS_PER_PERIOD = 96
+FINE_PER_KWH = 10.0  # fine per kWh above the limit (placeholder tariff)
+GRID_PRICE_PER_KWH = 8.0  # cost of a kWh of grid top-up (placeholder tariff)
+
+# Order in which renewable sources are used to meet demand
+MERIT_ORDER = ["solar", "wind", "hydro"]
+
+
+def _fines(grid, limit, fine_per_kwh, intervals_per_period):
+    # Per-period grid totals; the horizon must be a whole number of periods
+    period_grid = grid.reshape(*grid.shape[:-1], -1, intervals_per_period).sum(axis=-1)
+    excess = np.maximum(period_grid - limit, 0)
+    return period_grid, excess, excess * fine_per_kwh
+
+
+# Merit-order dispatch without storage. All inputs are kWh per interval with the
+# horizon on the last axis; leading axes (days, sites, scenarios) are solved at once.
+# Without storage this is optimal: every renewable kWh used is a grid kWh avoided.
+def dispatch_greedy(demand, solar, wind, hydro, limit=PRODUCTION_LIMIT_KWH, fine_per_kwh=FINE_PER_KWH,
+                    intervals_per_period=INTERVALS_PER_PERIOD):
+    available = {"solar": solar, "wind": wind, "hydro": hydro}
+    # Negative demand (e.g. the end-of-day noise step in interval_values) needs no supply
+    residual = np.maximum(np.asarray(demand, dtype=np.float64), 0)
+    schedule = {}
+    for source in MERIT_ORDER:
+        supply = np.maximum(np.asarray(available[source], dtype=np.float64), 0)
+        schedule[source] = np.minimum(supply, residual)
+        residual = residual - schedule[source]
+    schedule["curtailed"] = sum(np.maximum(np.asarray(available[s], dtype=np.float64), 0) for s in MERIT_ORDER) \
+        - sum(schedule[s] for s in MERIT_ORDER)
+    schedule["grid"] = residual
+    schedule["period_grid"], schedule["excess"], schedule["fine"] = _fines(residual, limit, fine_per_kwh, intervals_per_period)
+    return schedule
+
+
+# Dispatch with a hydro reservoir, solved as a linear program with scipy's HiGHS.
+# Solar and wind cannot be stored and are used first; water can be held back for
+# later intervals (up to `storage_kwh`) so it lands in periods that would otherwise
+# exceed the limit. Minimizes grid cost plus fines over one horizon (1-D inputs).
+def dispatch_lp(demand, solar, wind, hydro, storage_kwh, initial_storage_kwh=0.0, limit=PRODUCTION_LIMIT_KWH,
+                fine_per_kwh=FINE_PER_KWH, grid_price=GRID_PRICE_PER_KWH, intervals_per_period=INTERVALS_PER_PERIOD):
+    from scipy import sparse
+    from scipy.optimize import linprog
+
+    demand = np.asarray(demand, dtype=np.float64)
+    inflow = np.maximum(np.asarray(hydro, dtype=np.float64), 0)
+    first = dispatch_greedy(demand, solar, wind, np.zeros_like(demand), limit, fine_per_kwh, intervals_per_period)
+    residual = first["grid"]
+    T = len(demand)
+    P = T // intervals_per_period
+
+    # Variables: hydro used u[T], storage level s[T], spill w[T], period excess e[P]
+    # Storage balance: s[t] - s[t-1] + u[t] + w[t] = inflow[t]   (s[-1] = initial)
+    eye = sparse.identity(T, format="csr")
+    lag = sparse.eye(T, k=-1, format="csr")
+    balance = sparse.hstack([eye, eye - lag, eye, sparse.csr_matrix((T, P))])
+    balance_rhs = inflow.copy()
+    balance_rhs[0] += initial_storage_kwh
+
+    # Period limit on grid = residual - u:  -sum(u in p) - e[p] <= limit - sum(residual in p)
+    periods = sparse.kron(sparse.identity(P), np.ones((1, intervals_per_period)), format="csr")
+    limit_rows = sparse.hstack([-periods, sparse.csr_matrix((P, 2 * T)), -sparse.identity(P)])
+    limit_rhs = limit - residual.reshape(P, intervals_per_period).sum(axis=1)
+
+    cost = np.concatenate([np.full(T, -grid_price), np.zeros(2 * T), np.full(P, fine_per_kwh)])
+    bounds = [(0, r) for r in residual] + [(0, storage_kwh)] * T + [(0, None)] * T + [(0, None)] * P
+    result = linprog(cost, A_ub=limit_rows, b_ub=limit_rhs, A_eq=balance, b_eq=balance_rhs, bounds=bounds, method="highs")
+    if not result.success:
+        raise RuntimeError(f"Dispatch LP failed: {result.message}")
+
+    hydro_used = np.clip(result.x[:T], 0, residual)
+    schedule = {source: first[source] for source in ("solar", "wind")}
+    schedule["hydro"] = hydro_used
+    schedule["storage"] = result.x[T:2 * T]
+    schedule["curtailed"] = first["curtailed"] + result.x[2 * T:3 * T]
+    schedule["grid"] = residual - hydro_used
+    schedule["period_grid"], schedule["excess"], schedule["fine"] = _fines(schedule["grid"], limit, fine_per_kwh, intervals_per_period)
+    return schedule
+
+# Solve many independent horizons (rows of 2-D inputs), e.g. one per site
+def dispatch_lp_batch(demand, solar, wind, hydro, storage_kwh, **kwargs):
+    rows = [dispatch_lp(d, s, w, h, storage_kwh, **kwargs) for d, s, w, h in zip(demand, solar, wind, hydro)]
+    return {key: np.stack([row[key] for row in rows]) for key in rows[0]}
+
+
+# Daily summary table of a schedule for one horizon
+def summarize_schedule(schedule, period_index=None):
+    intervals_per_period = len(schedule["grid"]) // len(schedule["period_grid"])
+    totals = {key: schedule[key].reshape(-1, intervals_per_period).sum(axis=1)
+              for key in ("solar", "wind", "hydro", "curtailed")}
+    table = pd.DataFrame({**totals, "grid": schedule["period_grid"], "excess": schedule["excess"], "fine": schedule["fine"]})
+    if period_index is not None:
+        table.index = period_index
+    return table
+
+
+if __name__ == "__main__":
+    from dataset import DATA_PATH, interval_values, load_energy_data, prepare_energy_data, select_date_range
+
+    parser = argparse.ArgumentParser(description="Schedule solar, wind and hydro against the production limit")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--limit", type=float, default=PRODUCTION_LIMIT_KWH, help="kWh per day")
+    parser.add_argument("--fine", type=float, default=FINE_PER_KWH, help="fine per kWh above the limit")
+    parser.add_argument("--storage", type=float, default=0.0, help="hydro reservoir size in kWh (0 = run-of-river)")
+    args = parser.parse_args()
+
+    df = prepare_energy_data(load_energy_data(args.data))
+    df = select_date_range(df, args.start or df.index[0], args.end or df.index[-1])
+    # Whole days only
+    df = df.iloc[:len(df) // INTERVALS_PER_PERIOD * INTERVALS_PER_PERIOD]
+    values = interval_values(df)
+    inputs = [values[column].to_numpy(np.float64) for column in values.columns]
+    if args.storage > 0:
+        schedule = dispatch_lp(*inputs, storage_kwh=args.storage, limit=args.limit, fine_per_kwh=args.fine)
+    else:
+        schedule = dispatch_greedy(*inputs, limit=args.limit, fine_per_kwh=args.fine)
+    table = summarize_schedule(schedule, df.index[::INTERVALS_PER_PERIOD].date)
+    print(table.to_string())
+    print(f"\nGrid top-up: {table['grid'].sum():.2f} kWh, fine exposure: {table['fine'].sum():.2f}")
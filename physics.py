@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+# Every function accepts scalars or NumPy arrays and broadcasts over them, so whole
+# forecast grids, fleets of turbines or many time steps are evaluated in one call.
+# Energies are in kWh over a period of `hours`, powers in kW.
+
+# Physical constants
+AIR_DENSITY = 1.225  # kg/m³ (at sea level)
+WATER_DENSITY = 1000  # kg/m³ (density of water)
+GRAVITY = 9.81  # m/s² (acceleration due to gravity)
+SOLAR_DAILY_INSOLATION = 5  # kWh/m²/day on a clear day (approx. for sunny areas in India)
+JOULES_PER_KWH = 3.6e6
+
+
+# Configuration of one plant's solar, wind and hydro installations
+@dataclass(frozen=True)
+class PlantConfig:
+    solar_area: float = 5000  # m² (panel area)
+    solar_efficiency: float = 0.18
+    performance_ratio: float = 0.85  # System efficiency
+    blade_radius: float = 45  # m (turbine blade length)
+    turbine_efficiency: float = 0.3
+    air_density: float = AIR_DENSITY  # kg/m³
+    catchment_area: float = 2  # km²
+    head_height: float = 20  # m
+    runoff_coefficient: float = 0.85
+    hydro_efficiency: float = 0.85
+
+
+# Solar energy from cloud cover (%), scaling the clear-day insolation to the period
+def calculate_solar_energy(area, efficiency, cloud_cover, performance_ratio, hours=24):
+    insolation = SOLAR_DAILY_INSOLATION * (hours / 24) * (1 - np.asarray(cloud_cover) / 100)  # kWh/m²
+    return area * efficiency * insolation * performance_ratio
+
+# Solar energy from a measured irradiance (W/m²) held over the period
+def solar_energy_from_irradiance(irradiance, area, efficiency, hours, performance_ratio=1.0):
+    return np.asarray(irradiance) * efficiency * performance_ratio * hours * (area / 1000)
+
+# Electrical power (W) of a turbine with the given swept area
+def wind_power(swept_area, wind_speed, turbine_efficiency, air_density=AIR_DENSITY):
+    return 0.5 * air_density * swept_area * np.asarray(wind_speed) ** 3 * turbine_efficiency
+
+def calculate_wind_energy(blade_radius, wind_speed, turbine_efficiency, hours, air_density=AIR_DENSITY):
+    swept_area = np.pi * np.asarray(blade_radius) ** 2
+    return wind_power(swept_area, wind_speed, turbine_efficiency, air_density) * hours / 1000  # Convert Wh to kWh
+
+# River flow (m³/s) from precipitation (mm/hour) over a catchment (km²)
+def calculate_flow_rate(precipitation, catchment_area, runoff_coefficient=0.8):
+    catchment_area_m2 = np.asarray(catchment_area) * 1e6
+    precipitation_m = np.asarray(precipitation) / 1000
+    flow_volume_m3_per_hour = precipitation_m * catchment_area_m2 * runoff_coefficient
+    return flow_volume_m3_per_hour / 3600  # Convert to m³/s
+
+def estimate_hydropower(flow_rate, head_height, efficiency=0.85):
+    power = WATER_DENSITY * GRAVITY * np.asarray(flow_rate) * head_height * efficiency  # Power in Watts
+    return power / 1000  # Convert to kW
+
+def estimate_hydro_energy(flow_rate, head_height, efficiency=0.85, hours=24):
+    return estimate_hydropower(flow_rate, head_height, efficiency) * hours
+
+# Energy recovered from a volume of water (m³) dropping through the head
+def hydro_energy_from_volume(volume, head_height, efficiency):
+    return np.asarray(volume) * WATER_DENSITY * GRAVITY * head_height * efficiency / JOULES_PER_KWH
+
+# Energy of every source for a plant under the given weather, plus the total
+def estimate_generation(plant, cloud_cover, wind_speed, precipitation, hours=24):
+    solar = calculate_solar_energy(plant.solar_area, plant.solar_efficiency, cloud_cover, plant.performance_ratio, hours)
+    wind = calculate_wind_energy(plant.blade_radius, wind_speed, plant.turbine_efficiency, hours, plant.air_density)
+    flow_rate = calculate_flow_rate(precipitation, plant.catchment_area, plant.runoff_coefficient)
+    hydro = estimate_hydro_energy(flow_rate, plant.head_height, plant.hydro_efficiency, hours)
+    return {"solar": solar, "wind": wind, "hydro": hydro, "total": solar + wind + hydro}
+
+# Energy still to be sourced elsewhere once local generation is used
+def need_to_generate(energy_demand, total_generated):
+    return np.maximum(0, np.asarray(energy_demand) - total_generated)
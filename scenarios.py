@@ -0,0 +1,253 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from physics import PlantConfig, estimate_generation, need_to_generate
+
+# Sidebar parameters of app.py with their default values
+DEFAULTS = {
+    "solar_area": 50,  # m²
+    "solar_efficiency": 0.18,
+    "performance_ratio": 0.85,
+    "cloud_cover": 50,  # %
+    "blade_radius": 5,  # m
+    "wind_speed": 10,  # m/s
+    "turbine_efficiency": 0.30,
+    "precipitation": 50,  # mm/hour
+    "catchment_area": 2,  # km²
+    "head_height": 20,  # m
+    "runoff_coefficient": 0.85,
+    "energy_demand": 200,  # kWh/day
+}
+
+# Ranges sampled when no explicit range is given (slider bounds where app.py has them)
+PARAMETER_RANGES = {
+    "solar_area": (10, 10000),
+    "solar_efficiency": (0.10, 0.25),
+    "performance_ratio": (0.5, 1.0),
+    "cloud_cover": (0, 100),
+    "blade_radius": (1, 60),
+    "wind_speed": (1, 25),
+    "turbine_efficiency": (0.20, 0.40),
+    "precipitation": (1, 100),
+    "catchment_area": (0.1, 10),
+    "head_height": (5, 100),
+    "runoff_coefficient": (0.6, 0.9),
+    "energy_demand": (0, 500000),
+}
+
+PLANT_PARAMETERS = ["solar_area", "solar_efficiency", "performance_ratio", "blade_radius",
+                    "turbine_efficiency", "catchment_area", "head_height", "runoff_coefficient"]
+OUTPUTS = ["total_energy_generated", "need_to_generate"]
+
+CHUNK_SIZE = 1_000_000  # scenarios evaluated per vectorized step
+COVERAGE_BINS = 10  # bins per parameter in the coverage table
+
+
+# Daily generation and shortfall for arrays of scenarios (one element per scenario)
+def evaluate_scenarios(params):
+    plant = PlantConfig(**{name: params[name] for name in PLANT_PARAMETERS})
+    generation = estimate_generation(plant, params["cloud_cover"], params["wind_speed"], params["precipitation"], hours=24)
+    return {
+        "total_energy_generated": generation["total"],
+        "need_to_generate": need_to_generate(params["energy_demand"], generation["total"]),
+    }
+
+
+# Mergeable summary of a chunk: counts, means and centered co-moments of every
+# parameter with every output (for correlations), and per-bin coverage counts.
+# Centered sums keep the variance of a fixed parameter at exactly zero, where raw
+# sums of squares would leave cancellation noise.
+def _chunk_stats(params, bounds, bins):
+    outputs = evaluate_scenarios(params)
+    names = list(params)
+    n = max(np.size(params[name]) for name in names)
+    X = np.column_stack([np.broadcast_to(np.asarray(params[name], dtype=np.float64), n) for name in names])
+    Y = np.column_stack([np.broadcast_to(outputs[name], n) for name in OUTPUTS])
+    covered = Y[:, 1] == 0
+    x_mean, y_mean = X.mean(axis=0), Y.mean(axis=0)
+    X_centered, Y_centered = X - x_mean, Y - y_mean
+
+    lo = np.array([bounds[name][0] for name in names], dtype=np.float64)
+    width = np.array([bounds[name][1] - bounds[name][0] for name in names], dtype=np.float64)
+    width[width == 0] = 1
+    bin_index = np.clip(((X - lo) / width * bins).astype(np.int64), 0, bins - 1)
+    offsets = bin_index + np.arange(len(names)) * bins
+    return {
+        "names": names,
+        "count": n,
+        "covered": int(covered.sum()),
+        "x_mean": x_mean, "x_m2": (X_centered ** 2).sum(axis=0),
+        "y_mean": y_mean, "y_m2": (Y_centered ** 2).sum(axis=0),
+        "y_min": Y.min(axis=0), "y_max": Y.max(axis=0),
+        "xy": X_centered.T @ Y_centered,
+        "bin_count": np.bincount(offsets.ravel(), minlength=len(names) * bins),
+        "bin_covered": np.bincount(offsets[covered].ravel(), minlength=len(names) * bins),
+    }
+
+# Combine two chunk summaries; means and co-moments are merged pairwise (Chan et al.),
+# as in analytics.StreamingStats
+def _merge_stats(a, b):
+    if a is None:
+        return b
+    n = a["count"] + b["count"]
+    weight = a["count"] * b["count"] / n
+    dx, dy = b["x_mean"] - a["x_mean"], b["y_mean"] - a["y_mean"]
+    return {
+        "names": a["names"],
+        "count": n,
+        "covered": a["covered"] + b["covered"],
+        "x_mean": a["x_mean"] + dx * b["count"] / n, "x_m2": a["x_m2"] + b["x_m2"] + dx ** 2 * weight,
+        "y_mean": a["y_mean"] + dy * b["count"] / n, "y_m2": a["y_m2"] + b["y_m2"] + dy ** 2 * weight,
+        "y_min": np.minimum(a["y_min"], b["y_min"]), "y_max": np.maximum(a["y_max"], b["y_max"]),
+        "xy": a["xy"] + b["xy"] + np.outer(dx, dy) * weight,
+        "bin_count": a["bin_count"] + b["bin_count"],
+        "bin_covered": a["bin_covered"] + b["bin_covered"],
+    }
+
+
+# Scenario sources. Grids are enumerated lazily by flat index; Latin-hypercube chunks
+# are independent designs drawn from their own child seed.
+def _grid_chunk(axes, lo, hi):
+    names = list(axes)
+    shape = [len(axes[name]) for name in names]
+    index = np.unravel_index(np.arange(lo, hi), shape)
+    return {name: np.asarray(axes[name], dtype=np.float64)[i] for name, i in zip(names, index)}
+
+def latin_hypercube(ranges, n, rng):
+    samples = {}
+    for name, (lo, hi) in ranges.items():
+        strata = (rng.permutation(n) + rng.random(n)) / n
+        samples[name] = lo + strata * (hi - lo)
+    return samples
+
+# Parameter names must be app.py's; an unknown one would be ignored by the evaluation
+# while still multiplying the number of scenarios
+def _check_parameters(**mappings):
+    for kind, mapping in mappings.items():
+        unknown = sorted(set(mapping) - set(DEFAULTS))
+        if unknown:
+            raise ValueError(f"Unknown {kind} parameter(s): {', '.join(unknown)} (expected one of {', '.join(DEFAULTS)})")
+
+def _with_fixed(params, fixed):
+    return {name: params[name] if name in params else fixed.get(name, DEFAULTS[name]) for name in DEFAULTS}
+
+def _grid_task(axes, fixed, lo, hi, bounds, bins):
+    return _chunk_stats(_with_fixed(_grid_chunk(axes, lo, hi), fixed), bounds, bins)
+
+def _lhs_task(ranges, fixed, n, seed, bounds, bins):
+    return _chunk_stats(_with_fixed(latin_hypercube(ranges, n, np.random.default_rng(seed)), fixed), bounds, bins)
+
+def _run_tasks(task, arguments, n_jobs):
+    stats = None
+    if n_jobs == 1:
+        for args in arguments:
+            stats = _merge_stats(stats, task(*args))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            for result in pool.map(task, *zip(*arguments)):
+                stats = _merge_stats(stats, result)
+    return stats
+
+
+# Summary tables from merged stats
+def summarize(stats, bins=COVERAGE_BINS, bounds=None):
+    names, n = stats["names"], stats["count"]
+    y_mean = stats["y_mean"]
+    overview = pd.DataFrame({
+        "scenarios": [n],
+        "share_need_to_generate_zero": [stats["covered"] / n],
+        "mean_total_energy_generated": [y_mean[0]],
+        "mean_need_to_generate": [y_mean[1]],
+        "max_need_to_generate": [stats["y_max"][1]],
+    })
+
+    # Pearson correlation of each varied parameter with each output; parameters held
+    # fixed (equal bounds, or no spread at all) have none
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = stats["xy"] / np.sqrt(np.outer(stats["x_m2"], stats["y_m2"]))
+    sensitivity = pd.DataFrame(correlation, index=names, columns=[f"corr_{name}" for name in OUTPUTS])
+    varied = stats["x_m2"] > 0
+    if bounds is not None:
+        varied &= np.array([bounds[name][0] != bounds[name][1] for name in names])
+    sensitivity = sensitivity[varied].dropna(how="all")
+    sensitivity["rank"] = sensitivity["corr_need_to_generate"].abs().rank(ascending=False, method="min")
+    sensitivity = sensitivity.sort_values("rank")
+
+    # Share of scenarios with no shortfall, by parameter bin
+    counts = stats["bin_count"].reshape(len(names), bins)
+    covered = stats["bin_covered"].reshape(len(names), bins)
+    rows = []
+    for i, name in enumerate(names):
+        if bounds is not None and bounds[name][0] == bounds[name][1]:
+            continue
+        edges = np.linspace(*bounds[name], bins + 1) if bounds is not None else np.arange(bins + 1)
+        for b in range(bins):
+            if counts[i, b]:
+                rows.append({"parameter": name, "bin_low": edges[b], "bin_high": edges[b + 1],
+                             "scenarios": counts[i, b], "share_need_to_generate_zero": covered[i, b] / counts[i, b]})
+    coverage = pd.DataFrame(rows)
+    return {"overview": overview, "sensitivity": sensitivity, "coverage": coverage}
+
+
+# Full Cartesian product of `axes` ({parameter: values}); other parameters come from
+# `fixed` or DEFAULTS
+def run_grid(axes, fixed=None, chunk_size=CHUNK_SIZE, n_jobs=1, bins=COVERAGE_BINS):
+    fixed = fixed or {}
+    _check_parameters(axis=axes, fixed=fixed)
+    total = int(np.prod([len(values) for values in axes.values()]))
+    bounds = {name: (float(np.min(values)), float(np.max(values))) for name, values in axes.items()}
+    bounds.update({name: (fixed.get(name, DEFAULTS[name]),) * 2 for name in DEFAULTS if name not in axes})
+    arguments = [(axes, fixed, lo, min(lo + chunk_size, total), bounds, bins) for lo in range(0, total, chunk_size)]
+    return summarize(_run_tasks(_grid_task, arguments, n_jobs), bins, bounds)
+
+# `n` Latin-hypercube samples over `ranges` ({parameter: (low, high)}), generated in
+# chunks that each form their own design. Results depend only on `seed` and
+# `chunk_size`, not on `n_jobs`.
+def run_latin_hypercube(ranges=None, n=1_000_000, fixed=None, seed=None, chunk_size=CHUNK_SIZE, n_jobs=1, bins=COVERAGE_BINS):
+    ranges = ranges or PARAMETER_RANGES
+    fixed = fixed or {}
+    _check_parameters(range=ranges, fixed=fixed)
+    bounds = dict(ranges)
+    bounds.update({name: (fixed.get(name, DEFAULTS[name]),) * 2 for name in DEFAULTS if name not in ranges})
+    sizes = [min(chunk_size, n - lo) for lo in range(0, n, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    arguments = [(ranges, fixed, size, child, bounds, bins) for size, child in zip(sizes, seeds)]
+    return summarize(_run_tasks(_lhs_task, arguments, n_jobs), bins, bounds)
+
+
+def _parse_axis(text):
+    # name=low:high:steps
+    name, spec = text.split("=")
+    if name not in DEFAULTS:
+        raise argparse.ArgumentTypeError(f"unknown parameter {name!r} (expected one of {', '.join(DEFAULTS)})")
+    low, high, steps = spec.split(":")
+    return name, np.linspace(float(low), float(high), int(steps))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep app.py's generation calculator over many scenarios")
+    parser.add_argument("--n-jobs", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--output", help="Prefix for CSV output of the summary tables")
+    commands = parser.add_subparsers(dest="command", required=True)
+    lhs = commands.add_parser("lhs", help="Latin-hypercube samples over PARAMETER_RANGES")
+    lhs.add_argument("--samples", type=int, default=1_000_000)
+    lhs.add_argument("--seed", type=int, default=None)
+    grid = commands.add_parser("grid", help="Cartesian grid")
+    grid.add_argument("--axis", action="append", required=True, type=_parse_axis, help="name=low:high:steps")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "lhs":
+            tables = run_latin_hypercube(n=args.samples, seed=args.seed, chunk_size=args.chunk_size, n_jobs=args.n_jobs)
+        else:
+            tables = run_grid(dict(args.axis), chunk_size=args.chunk_size, n_jobs=args.n_jobs)
+    except ValueError as error:
+        parser.error(str(error))
+    for name, table in tables.items():
+        print(f"\n{name}\n{table.to_string()}")
+        if args.output:
+            table.to_csv(f"{args.output}_{name}.csv", index=name == "sensitivity")
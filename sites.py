@@ -0,0 +1,134 @@
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+
+from addingnoise import END_DATE, START_DATE, iter_energy_chunks, site_profile, write_energy_data
+from dataset import DATA_PATH, dataset_hash
+
+SITES_PATH = "sites.example.json"
+FLEET_PATH = "energy_sites"
+MANIFEST_NAME = "manifest.json"
+
+# Equipment sections of a site entry and the SiteProfile field each key sets
+EQUIPMENT_FIELDS = {
+    "solar": {"area": "solar_panel_area", "efficiency": "solar_panel_efficiency"},
+    "wind": {"area": "wind_turbine_area", "efficiency": "wind_turbine_efficiency"},
+    "hydro": {"head_height": "head_height", "efficiency": "hydro_turbine_efficiency"},
+}
+
+
+# Site configuration file:
+# {"seed": 42, "start": "2020-01-01", "end": "2020-12-31 23:45",
+#  "sites": [{"name": "pen", "location": {"lat": 18.74, "lon": 73.1}, "climate": "coastal",
+#             "solar": {"area": 1500}, "wind": {"area": 120}, "hydro": {"head_height": 40},
+#             "start": "2021-01-01", "params": {"interval_consumption": 8}}, ...]}
+# Sites inherit the top-level date range unless they set their own; "params" holds any
+# other SiteProfile field.
+def load_sites(path=SITES_PATH):
+    with open(path) as f:
+        config = json.load(f)
+    names = [site["name"] for site in config["sites"]]
+    if len(set(names)) != len(names):
+        raise ValueError("Site names must be unique")
+    return config
+
+def site_params(site):
+    params = dict(site.get("params", {}))
+    for section, fields in EQUIPMENT_FIELDS.items():
+        for key, value in site.get(section, {}).items():
+            if key not in fields:
+                raise ValueError(f"Unknown {section} parameter for site {site['name']}: {key}")
+            params[fields[key]] = value
+    return site_profile(site.get("climate", "tropical"), **params)
+
+# Generate one site into output/site=<name>/year=YYYY/month=MM/ (or one CSV file in
+# output/site=<name>/) and describe it for the manifest. Runs in a worker process;
+# everything random comes from `seed`. Whatever an earlier run left in the site's
+# directory is removed first, so the manifest describes exactly what is on disk.
+def generate_site(site, seed, start, end, output, fmt="parquet", chunk="MS"):
+    started = time.perf_counter()
+    profile = site_params(site)
+    directory = Path(output) / f"site={site['name']}"
+    if directory.exists():
+        shutil.rmtree(directory)
+    target = directory
+    if fmt == "csv":
+        directory.mkdir(parents=True, exist_ok=True)
+        target = directory / DATA_PATH
+    rows = 0
+
+    def counted(chunks):
+        nonlocal rows
+        for df in chunks:
+            rows += len(df)
+            yield df
+
+    write_energy_data(counted(iter_energy_chunks(start, end, seed=seed, chunk=chunk, site=profile)), target, fmt)
+    return {
+        "name": site["name"],
+        "location": site.get("location"),
+        "climate": site.get("climate", "tropical"),
+        "start": str(start),
+        "end": str(end),
+        "path": target.relative_to(output).as_posix(),
+        "rows": rows,
+        "seed_entropy": str(seed.entropy),
+        "spawn_key": list(seed.spawn_key),
+        "profile": asdict(profile),
+        "content_hash": dataset_hash(target),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+# Generate every site of a configuration in a process pool. Site i always draws from
+# child i of SeedSequence(seed), so the data does not depend on the worker count or on
+# which worker runs which site. Returns the manifest, also written to the output.
+def generate_fleet(config, output=FLEET_PATH, workers=None, fmt="parquet", chunk="MS"):
+    started = time.perf_counter()
+    root = np.random.SeedSequence(config.get("seed"))
+    seeds = root.spawn(len(config["sites"]))
+    default_start, default_end = config.get("start", START_DATE), config.get("end", END_DATE)
+    Path(output).mkdir(parents=True, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(generate_site, site, seed, site.get("start", default_start),
+                               site.get("end", default_end), output, fmt, chunk)
+                   for site, seed in zip(config["sites"], seeds)]
+        sites = [future.result() for future in futures]
+    manifest = {
+        "seed_entropy": str(root.entropy),
+        "format": fmt,
+        "chunk": chunk,
+        "workers": workers or os.cpu_count(),
+        "rows": sum(site["rows"] for site in sites),
+        "seconds": round(time.perf_counter() - started, 3),
+        "sites": sites,
+    }
+    with open(Path(output) / MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate per-site datasets for a fleet of plants in parallel")
+    parser.add_argument("config", nargs="?", default=SITES_PATH, help="Site configuration (JSON)")
+    parser.add_argument("--output", default=FLEET_PATH)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="parquet")
+    parser.add_argument("--chunk", default="MS", help="Rows generated per step, as a pandas frequency (e.g. MS, 7D)")
+    parser.add_argument("--seed", type=int, default=None, help="Overrides the configuration's seed")
+    args = parser.parse_args()
+
+    config = load_sites(args.config)
+    if args.seed is not None:
+        config["seed"] = args.seed
+    manifest = generate_fleet(config, args.output, args.workers, args.format, args.chunk)
+    for site in manifest["sites"]:
+        print(f"{site['name']:>12}: {site['rows']:,} rows in {site['seconds']:.2f}s ({site['content_hash'][:12]})")
+    print(f"{manifest['rows']:,} rows for {len(manifest['sites'])} sites in {manifest['seconds']:.2f}s "
+          f"with {manifest['workers']} workers; manifest at {Path(args.output) / MANIFEST_NAME}")
@@ -0,0 +1,18 @@
+from pathlib import Path
+
+import streamlit as st
+
+# Entry point for all dashboards: `streamlit run streamlit_app.py`. The pages run in
+# this one server process. A page's script (and the libraries it imports) only runs
+# when it is opened, and datasets, models and the weather client are st.cache_resource
+# objects shared by every page and session, so switching pages reloads nothing.
+LOGO = Path(__file__).with_name("jsw energy logo.png")
+
+st.sidebar.image(str(LOGO), use_container_width=True)
+page = st.navigation([
+    st.Page("main.py", title="Main Application", icon="📊", default=True),
+    st.Page("app.py", title="App", icon="⚡"),
+    st.Page("appapi.py", title="AppAPI", icon="🌤️"),
+    st.Page("live.py", title="Live", icon="📡"),
+])
+page.run()
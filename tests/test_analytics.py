@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import StreamingStats, stratified_sample, streaming_stats
+
+
+def _frame(days, rows_per_day=96):
+    index = pd.date_range("2020-01-01", periods=days * rows_per_day, freq="15min")
+    return pd.DataFrame({"a": np.arange(len(index), dtype=float), "b": np.ones(len(index))}, index=index)
+
+
+@pytest.mark.parametrize("size", [1, 10, 500, 1000, 5000])
+def test_stratified_sample_is_capped(size):
+    df = _frame(days=2192)
+    sample = stratified_sample(df, size)
+    assert len(sample) <= size
+    assert len(sample) == size
+    assert sample.index.is_monotonic_increasing
+
+
+def test_stratified_sample_spreads_over_days():
+    df = _frame(days=100)
+    sample = stratified_sample(df, 1000)
+    per_day = sample.index.normalize().value_counts()
+    assert len(per_day) == 100
+    assert per_day.min() == per_day.max() == 10
+
+
+def test_stratified_sample_samples_days_when_size_is_small():
+    df = _frame(days=100)
+    sample = stratified_sample(df, 30)
+    assert len(sample) == 30
+    assert sample.index.normalize().nunique() == 30
+
+
+def test_stratified_sample_returns_small_frames_unchanged():
+    df = _frame(days=1)
+    assert stratified_sample(df, 1000) is df
+
+
+def test_streaming_stats_matches_pandas():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(1000, 3)), columns=["x", "y", "z"])
+    stats = streaming_stats(df, ["x", "z"], chunk_rows=64)
+    assert stats.n == 1000
+    np.testing.assert_allclose(stats.mean, df[["x", "z"]].mean())
+    np.testing.assert_allclose(stats.covariance(), df[["x", "z"]].cov())
+    np.testing.assert_allclose(stats.correlation(), df[["x", "z"]].corr())
+
+
+def test_streaming_stats_merge_of_empty_is_noop():
+    stats = StreamingStats(["x"]).update(np.empty((0, 1)))
+    assert stats.n == 0
@@ -0,0 +1,91 @@
+import pyarrow as pa
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+from addingnoise import generate_energy_data
+from dataset import FEATURES
+from model_registry import train_and_register
+
+ROW = {"temperature_C": 25.0, "humidity_%": 50.0, "wind_speed_mps": 5.0, "is_sunny": 1, "cloud_cover_%": 20.0,
+       "solar_irradiance_Wm2": 700.0, "air_density_kgm3": 1.2, "precipitation_mm": 2.0, "runoff_coefficient": 0.06,
+       "hour": 12, "minute": 30, "day": 15}
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    root = tmp_path_factory.mktemp("api")
+    data_path = root / "energy.csv"
+    generate_energy_data("2020-01-01", "2020-01-07 23:45", seed=0).to_csv(data_path, index=False)
+    train_and_register(data_path, model_dir=root / "models", update_latest=True)
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("MODEL_DIR", str(root / "models"))
+        patch.delenv("MODEL_KEY", raising=False)
+        with TestClient(api.app) as client:
+            yield client
+
+
+def _columns(**changes):
+    columns = {name: [ROW[name]] * 3 for name in FEATURES}
+    columns.update(changes)
+    return {"columns": columns}
+
+def _arrow(columns):
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def _post_arrow(client, body):
+    return client.post("/predict/batch", content=body, headers={"content-type": api.ARROW_STREAM})
+
+
+def test_row_and_columnar_predictions_agree(client):
+    single = client.post("/predict", json=ROW)
+    batch = client.post("/predict/batch", json=_columns())
+    assert single.status_code == batch.status_code == 200
+    assert batch.json()["predictions"] == [single.json()["prediction"]] * 3
+
+
+@pytest.mark.parametrize("changes", [
+    {"hour": [12, 99, 12]},
+    {"minute": [-1, 0, 0]},
+    {"day": [0, 1, 2]},
+    {"is_sunny": [0, 1, 2]},
+    {"hour": [12.5, 12, 12]},
+])
+def test_columnar_input_out_of_range_is_rejected(client, changes):
+    response = client.post("/predict/batch", json=_columns(**changes))
+    assert response.status_code == 422
+
+
+def test_columnar_input_with_unequal_lengths_is_rejected(client):
+    response = client.post("/predict/batch", json=_columns(hour=[1, 2]))
+    assert response.status_code == 422
+
+
+def test_arrow_input_is_scored(client):
+    response = _post_arrow(client, _arrow(_columns()["columns"]))
+    assert response.status_code == 200
+    assert len(response.json()["predictions"]) == 3
+
+
+def test_arrow_input_out_of_range_is_rejected(client):
+    response = _post_arrow(client, _arrow(_columns(hour=[12, 99, 12])["columns"]))
+    assert response.status_code == 422
+
+
+def test_arrow_input_with_nulls_is_rejected(client):
+    response = _post_arrow(client, _arrow(_columns(temperature_C=[25.0, None, 25.0])["columns"]))
+    assert response.status_code == 422
+
+
+def test_arrow_input_with_missing_column_is_rejected(client):
+    columns = _columns()["columns"]
+    del columns["day"]
+    assert _post_arrow(client, _arrow(columns)).status_code == 422
+
+
+def test_malformed_arrow_stream_is_rejected(client):
+    assert _post_arrow(client, b"not an arrow stream").status_code == 400
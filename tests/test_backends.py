@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+from addingnoise import generate_energy_data, write_energy_data
+from backends import PandasBackend, make_backend
+
+
+@pytest.fixture(scope="module")
+def sources(tmp_path_factory):
+    root = tmp_path_factory.mktemp("it's a \"quoted\" dir")
+    df = generate_energy_data("2020-01-20", "2020-02-10 23:45", seed=0)
+    csv = root / "energy.csv"
+    df.to_csv(csv, index=False)
+    write_energy_data([df], root / "parquet", "parquet")
+    return csv, root / "parquet"
+
+
+@pytest.mark.parametrize("name", ["duckdb", "polars", "arrow"])
+def test_partitioned_backends_match_pandas(sources, name):
+    pytest.importorskip({"duckdb": "duckdb", "polars": "polars", "arrow": "pyarrow"}[name])
+    csv, parquet = sources
+    expected = PandasBackend(csv)
+    backend = make_backend(name, parquet)
+    assert backend.date_bounds() == expected.date_bounds()
+    pd.testing.assert_frame_equal(backend.load_range("2020-01-31", "2020-02-01"),
+                                  expected.load_range("2020-01-31", "2020-02-01"), check_freq=False)
+    # pandas averages in the float32 storage dtype, the engines in float64
+    pd.testing.assert_frame_equal(backend.aggregate("1D"), expected.aggregate("1D"), check_freq=False,
+                                  check_dtype=False, rtol=1e-5)
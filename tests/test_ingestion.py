@@ -0,0 +1,73 @@
+import asyncio
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+
+from addingnoise import generate_energy_data
+from dataset import interval_values
+from ingestion import BUFFER_INTERVALS, CHANNELS, Ingestor, _readings, serve_socket
+
+
+def _lines(df, unit):
+    return [json.dumps({"unit": unit, "timestamp": str(row["timestamp"]), **{c: float(row[c]) for c in CHANNELS}})
+            for _, row in df.iterrows()]
+
+
+def test_buffer_matches_interval_values():
+    df = generate_energy_data("2020-01-01", "2020-01-10 23:45", seed=0)
+    ingestor = Ingestor()
+    ingestor.ingest(_readings(df, "u"))
+    expected = interval_values(df.set_index("timestamp", drop=False)).iloc[-BUFFER_INTERVALS:]
+    history = ingestor.history("u")
+    np.testing.assert_allclose(history[CHANNELS].to_numpy(), expected[CHANNELS].to_numpy(np.float64), atol=1e-3)
+
+
+def test_old_readings_are_rejected():
+    df = generate_energy_data("2020-01-01", "2020-01-01 23:45", seed=0)
+    ingestor = Ingestor()
+    readings = _readings(df, "u")
+    ingestor.ingest(readings)
+    ingestor.ingest(readings[:5])
+    assert ingestor.received == len(readings) + 5
+    assert ingestor.rejected == 5
+
+
+def test_reject_is_thread_safe():
+    ingestor = Ingestor()
+    threads = [threading.Thread(target=lambda: [ingestor.reject() for _ in range(10_000)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert ingestor.rejected == ingestor.received == 40_000
+
+
+def test_socket_keeps_last_line_without_newline():
+    df = generate_energy_data("2020-01-01", "2020-01-01 04:45", seed=0)
+    payload = ("\n".join(_lines(df, "s1") + ["not json"]) + "\n" + _lines(df.iloc[-1:].assign(
+        timestamp=pd.Timestamp("2020-01-01 05:00")), "s1")[0]).encode()
+
+    async def run():
+        ingestor = Ingestor()
+        worker = asyncio.ensure_future(ingestor.run())
+        await asyncio.sleep(0)
+        server = await serve_socket(ingestor, port=0)
+        port = server.sockets[0].getsockname()[1]
+        _, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(payload)
+        await writer.drain()
+        writer.close()
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if ingestor.received == len(df) + 2:
+                break
+        await ingestor.queue.join()
+        server.close()
+        worker.cancel()
+        return ingestor
+
+    ingestor = asyncio.run(run())
+    assert ingestor.rejected == 1
+    assert len(ingestor.history("s1")) == len(df) + 1
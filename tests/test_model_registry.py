@@ -0,0 +1,30 @@
+import pytest
+
+from addingnoise import generate_energy_data
+from dataset import dataset_hash
+from model_registry import DEFAULT_PARAMS, latest_model_key, model_key, registered_model_key, train_and_register
+
+
+@pytest.fixture(scope="module")
+def data_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("registry") / "energy.csv"
+    generate_energy_data("2020-01-01", "2020-01-03 23:45", seed=0).to_csv(path, index=False)
+    return path
+
+
+def test_only_explicit_training_moves_latest(data_path, tmp_path):
+    params = {**DEFAULT_PARAMS, "n_estimators": 5}
+    served = train_and_register(data_path, params=params, model_dir=tmp_path, update_latest=True)
+    train_and_register(data_path, model_dir=tmp_path)
+    assert latest_model_key(tmp_path) == served
+
+def test_registered_model_falls_back_to_latest_for_same_data(data_path, tmp_path):
+    data_hash = dataset_hash(data_path)
+    assert registered_model_key(data_hash, model_dir=tmp_path) is None
+    params = {**DEFAULT_PARAMS, "n_estimators": 5}
+    served = train_and_register(data_path, params=params, model_dir=tmp_path, update_latest=True)
+    assert registered_model_key(data_hash, model_dir=tmp_path) == served
+    assert registered_model_key("other-data", model_dir=tmp_path) is None
+    default = train_and_register(data_path, model_dir=tmp_path)
+    assert default == model_key(data_hash)
+    assert registered_model_key(data_hash, model_dir=tmp_path) == default
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from addingnoise import generate_energy_data
+from online_model import MAX_TREES, TREES_PER_UPDATE, OnlineConsumptionModel
+
+
+@pytest.fixture(scope="module")
+def readings():
+    return generate_energy_data("2020-01-01", "2020-02-29 23:45", seed=0)
+
+
+def _ingest_days(model, readings, days):
+    for day in range(days):
+        model.ingest(readings.iloc[day * 96:(day + 1) * 96])
+
+
+def test_forest_keeps_at_most_max_trees_with_fresh_seeds(readings):
+    model = OnlineConsumptionModel("forest")
+    _ingest_days(model, readings, MAX_TREES // TREES_PER_UPDATE + 10)
+    forests = [forest for _, _, forest in model.model]
+    assert sum(len(forest.estimators_) for forest in forests) == MAX_TREES
+    seeds = [forest.random_state for forest in forests]
+    assert len(set(seeds)) == len(seeds)
+    assert seeds == sorted(seeds)
+
+
+def test_forest_trees_keep_the_scaling_they_were_trained_with(readings):
+    model = OnlineConsumptionModel("forest")
+    _ingest_days(model, readings, 3)
+    scaler, target_scaler, forest = model.model[0]
+    X = model._features(readings.iloc[-96:])
+    before = forest.predict(scaler.transform(X))
+    mean_before = scaler.mean_.copy()
+    _ingest_days(model, readings.iloc[3 * 96:], 10)
+    assert model.model[0][2] is forest
+    np.testing.assert_array_equal(model.model[0][0].mean_, mean_before)
+    np.testing.assert_array_equal(forest.predict(model.model[0][0].transform(X)), before)
+    assert not np.array_equal(model.scaler.mean_, mean_before)
+
+
+def test_forest_predictions_are_finite(readings):
+    model = OnlineConsumptionModel("forest")
+    _ingest_days(model, readings, 5)
+    predictions = model.predict(readings.iloc[5 * 96:6 * 96])
+    assert predictions.shape == (96,)
+    assert np.isfinite(predictions).all()
+
+def test_save_creates_the_model_directory(readings, tmp_path):
+    model = OnlineConsumptionModel("sgd")
+    _ingest_days(model, readings, 2)
+    path = tmp_path / "models" / "online.joblib"
+    model.save(path)
+    np.testing.assert_array_equal(OnlineConsumptionModel.load(path).predict(readings.iloc[:96]),
+                                  model.predict(readings.iloc[:96]))
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from optimizer import MERIT_ORDER, dispatch_greedy, dispatch_lp
+
+
+def _inputs(seed=0, days=2, intervals=96):
+    rng = np.random.default_rng(seed)
+    shape = (days * intervals,)
+    demand = rng.uniform(0, 10, shape)
+    demand[::17] = -rng.uniform(0, 5, demand[::17].shape)  # negative noise steps
+    return demand, rng.uniform(0, 4, shape), rng.uniform(0, 4, shape), rng.uniform(0, 4, shape)
+
+
+def test_dispatch_greedy_stays_within_available_supply():
+    demand, solar, wind, hydro = _inputs()
+    schedule = dispatch_greedy(demand, solar, wind, hydro, limit=100)
+    available = {"solar": solar, "wind": wind, "hydro": hydro}
+    for source in MERIT_ORDER:
+        assert (schedule[source] >= 0).all()
+        assert (schedule[source] <= available[source]).all()
+    assert (schedule["curtailed"] >= 0).all()
+    assert (schedule["curtailed"] <= solar + wind + hydro + 1e-9).all()
+    assert (schedule["grid"] >= 0).all()
+
+
+def test_dispatch_greedy_negative_demand_dispatches_nothing():
+    ones = np.ones(96)
+    schedule = dispatch_greedy(-5 * ones, ones, ones, ones)
+    for source in MERIT_ORDER:
+        np.testing.assert_array_equal(schedule[source], 0)
+    np.testing.assert_array_equal(schedule["curtailed"], 3)
+    np.testing.assert_array_equal(schedule["grid"], 0)
+
+
+def test_dispatch_greedy_balances_demand():
+    demand, solar, wind, hydro = _inputs(seed=1)
+    schedule = dispatch_greedy(demand, solar, wind, hydro)
+    served = sum(schedule[source] for source in MERIT_ORDER) + schedule["grid"]
+    np.testing.assert_allclose(served, np.maximum(demand, 0))
+
+
+def test_dispatch_greedy_batches_leading_axes():
+    demand, solar, wind, hydro = (np.stack([a, a[::-1]]) for a in _inputs(seed=2))
+    batched = dispatch_greedy(demand, solar, wind, hydro)
+    single = dispatch_greedy(demand[1], solar[1], wind[1], hydro[1])
+    np.testing.assert_array_equal(batched["grid"][1], single["grid"])
+
+
+def test_dispatch_lp_without_storage_matches_greedy():
+    pytest.importorskip("scipy")
+    demand, solar, wind, hydro = _inputs(seed=3)
+    greedy = dispatch_greedy(demand, solar, wind, hydro, limit=200)
+    lp = dispatch_lp(demand, solar, wind, hydro, storage_kwh=0.0, limit=200)
+    for source in MERIT_ORDER:
+        np.testing.assert_allclose(lp[source], greedy[source], atol=1e-6)
+    np.testing.assert_allclose(lp["grid"], greedy["grid"], atol=1e-6)
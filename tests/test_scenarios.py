@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from scenarios import run_grid, run_latin_hypercube
+
+
+def test_fixed_parameters_have_no_sensitivity():
+    axes = {"cloud_cover": np.linspace(0, 100, 101), "wind_speed": np.linspace(1, 25, 25)}
+    sensitivity = run_grid(axes, fixed={"energy_demand": 200_000}, chunk_size=500)["sensitivity"]
+    assert sorted(sensitivity.index) == ["cloud_cover", "wind_speed"]
+
+def test_chunked_moments_match_one_chunk():
+    ranges = {"cloud_cover": (0, 100), "wind_speed": (1, 25), "energy_demand": (0, 500_000)}
+    whole = run_grid({name: np.linspace(*bounds, 12) for name, bounds in ranges.items()})
+    chunked = run_grid({name: np.linspace(*bounds, 12) for name, bounds in ranges.items()}, chunk_size=100)
+    np.testing.assert_allclose(chunked["sensitivity"].sort_index().to_numpy(),
+                               whole["sensitivity"].sort_index().to_numpy(), atol=1e-12)
+    np.testing.assert_allclose(chunked["overview"].to_numpy(), whole["overview"].to_numpy())
+    lhs = run_latin_hypercube(ranges, n=2_000, seed=0, chunk_size=300)["sensitivity"]
+    assert sorted(lhs.index) == sorted(ranges)
+
+def test_unknown_parameters_are_rejected():
+    with pytest.raises(ValueError, match="windspeed"):
+        run_grid({"windspeed": np.linspace(1, 25, 5), "cloud_cover": np.linspace(0, 100, 11)})
+    with pytest.raises(ValueError, match="cloudcover"):
+        run_grid({"wind_speed": [5, 10]}, fixed={"cloudcover": 20})
+    with pytest.raises(ValueError, match="precip"):
+        run_latin_hypercube({"precip": (0, 10)}, n=10)
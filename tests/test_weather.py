@@ -0,0 +1,120 @@
+import asyncio
+
+import httpx
+import pytest
+
+from weather import OpenWeatherProvider, StubWeatherProvider, SyncWeatherClient, WeatherClient, WeatherError
+
+VALID = {"clouds": {"all": 75}, "wind": {"speed": 4.1}, "rain": {"3h": 3.0}, "main": {"temp": 28.5}}
+
+
+def _provider(handler):
+    provider = OpenWeatherProvider(api_key="test", max_retries=0)
+    provider.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return provider
+
+
+def test_parse_valid_response():
+    reading = OpenWeatherProvider.parse("Pen,IN", VALID)
+    assert reading == {"location": "Pen,IN", "cloud_cover": 75, "wind_speed": 4.1, "precipitation": 1.0,
+                       "temperature": 28.5}
+
+
+def test_parse_without_optional_fields():
+    reading = OpenWeatherProvider.parse("Pen,IN", {"clouds": {"all": 0}, "wind": {"speed": 2}})
+    assert reading["precipitation"] == 0.0
+    assert reading["temperature"] is None
+
+
+@pytest.mark.parametrize("data", [
+    {},
+    [],
+    None,
+    "text",
+    {"clouds": {}, "wind": {"speed": 4.1}},
+    {"clouds": None, "wind": {"speed": 4.1}},
+    {"clouds": {"all": "cloudy"}, "wind": {"speed": 4.1}},
+    {"clouds": {"all": 75}, "wind": 4.1},
+    {"clouds": {"all": 75}, "wind": {"speed": 4.1}, "rain": {"1h": None}},
+    {"clouds": {"all": 75}, "wind": {"speed": 4.1}, "main": "hot"},
+])
+def test_parse_malformed_response_raises_weather_error(data):
+    with pytest.raises(WeatherError):
+        OpenWeatherProvider.parse("Pen,IN", data)
+
+
+def test_fetch_non_json_body_raises_weather_error():
+    provider = _provider(lambda request: httpx.Response(200, text="<html>maintenance</html>"))
+    with pytest.raises(WeatherError):
+        asyncio.run(provider.fetch("Pen,IN"))
+
+
+def test_fetch_parses_response():
+    provider = _provider(lambda request: httpx.Response(200, json=VALID))
+    assert asyncio.run(provider.fetch("Pen,IN"))["cloud_cover"] == 75
+
+
+def test_missing_api_key_raises_weather_error(monkeypatch):
+    monkeypatch.delenv("OPENWEATHER_API_KEY", raising=False)
+    with pytest.raises(WeatherError, match="API key"):
+        OpenWeatherProvider()
+
+
+def test_concurrent_gets_for_one_location_share_one_fetch():
+    provider = StubWeatherProvider(delay=0.05)
+    client = WeatherClient(provider)
+
+    async def run():
+        return await asyncio.gather(*(client.get("Pen,IN") for _ in range(10)))
+
+    readings = asyncio.run(run())
+    assert provider.calls == 1
+    assert all(reading == readings[0] for reading in readings)
+
+
+def test_cached_reading_is_reused_within_ttl():
+    provider = StubWeatherProvider(delay=0.01)
+    client = WeatherClient(provider, ttl=60)
+
+    async def run():
+        first = await client.get("Pen,IN")
+        return first, await client.get("Pen,IN")
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert provider.calls == 1
+    assert (client.hits, client.misses) == (1, 1)
+
+
+def test_reading_is_fetched_again_after_ttl():
+    provider = StubWeatherProvider(delay=0.01)
+    client = WeatherClient(provider, ttl=0.05)
+
+    async def run():
+        await client.get("Pen,IN")
+        await asyncio.sleep(0.1)
+        await client.get("Pen,IN")
+
+    asyncio.run(run())
+    assert provider.calls == 2
+
+
+def test_get_many_returns_weather_error_for_failing_location():
+    provider = StubWeatherProvider(readings={"Pen,IN": {"cloud_cover": 40, "wind_speed": 3.0}}, delay=0.01,
+                                   failing=["Nowhere"])
+    client = WeatherClient(provider)
+    results = asyncio.run(client.get_many(["Pen,IN", "Nowhere", "Pune,IN"]))
+    assert results["Pen,IN"]["cloud_cover"] == 40
+    assert isinstance(results["Nowhere"], WeatherError)
+    assert results["Pune,IN"]["location"] == "Pune,IN"
+    assert provider.calls == 3
+
+
+def test_sync_client_serves_from_its_own_loop():
+    provider = StubWeatherProvider(delay=0.01)
+    client = SyncWeatherClient(WeatherClient(provider))
+    try:
+        assert client.get("Pen,IN", timeout=5) == client.get("Pen,IN", timeout=5)
+        assert provider.calls == 1
+    finally:
+        client.close()
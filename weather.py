@@ -0,0 +1,224 @@
+import asyncio
+import os
+import random
+import threading
+import time
+
+import httpx
+
+# OpenWeatherMap current-weather endpoint used by appapi.py
+OPENWEATHER_URL = "http://api.openweathermap.org/data/2.5/weather"
+
+# Client defaults
+TIMEOUT_SECONDS = 5.0
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 0.5  # first retry delay, doubled on every further attempt
+CACHE_TTL_SECONDS = 600  # OpenWeatherMap refreshes current weather every ~10 minutes
+MAX_CONNECTIONS = 20
+
+# Provider used by make_provider() when none is named ("openweather" or "stub")
+WEATHER_PROVIDER = os.environ.get("WEATHER_PROVIDER", "openweather")
+
+
+class WeatherError(Exception):
+    pass
+
+
+# OpenWeatherMap API key from the OPENWEATHER_API_KEY environment variable or, under
+# Streamlit, from the secret of the same name (.streamlit/secrets.toml)
+def openweather_api_key():
+    key = os.environ.get("OPENWEATHER_API_KEY")
+    if not key:
+        try:
+            import streamlit as st
+
+            key = st.secrets.get("OPENWEATHER_API_KEY")
+        except (ImportError, FileNotFoundError):  # no streamlit, or no secrets file
+            key = None
+    if not key:
+        raise WeatherError("No OpenWeatherMap API key: set OPENWEATHER_API_KEY in the environment or in "
+                           ".streamlit/secrets.toml, or use WEATHER_PROVIDER=stub")
+    return key
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(f"expected a number, got {value!r}")
+    return value
+
+
+# Normalized reading returned by every provider
+def weather_reading(location, cloud_cover, wind_speed, precipitation=0.0, temperature=None):
+    return {
+        "location": location,
+        "cloud_cover": cloud_cover,  # %
+        "wind_speed": wind_speed,  # m/s
+        "precipitation": precipitation,  # mm/hour
+        "temperature": temperature,  # °C
+    }
+
+
+# Current weather from OpenWeatherMap over one pooled HTTP connection
+class OpenWeatherProvider:
+    def __init__(self, api_key=None, url=OPENWEATHER_URL, timeout=TIMEOUT_SECONDS,
+                 max_retries=MAX_RETRIES, backoff=BACKOFF_SECONDS, max_connections=MAX_CONNECTIONS):
+        self.api_key = api_key or openweather_api_key()
+        self.url = url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_connections = max_connections
+        self.client = None
+
+    def _client(self):
+        if self.client is None:
+            limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+            self.client = httpx.AsyncClient(timeout=self.timeout, limits=limits)
+        return self.client
+
+    async def fetch(self, location):
+        params = {"q": location, "appid": self.api_key, "units": "metric"}
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._client().get(self.url, params=params)
+            except httpx.TransportError as exc:
+                error = exc
+            else:
+                # Client errors (bad key, unknown city) will not succeed on retry
+                if 400 <= response.status_code < 500 and response.status_code != 429:
+                    raise WeatherError(f"{location}: HTTP {response.status_code} {response.text[:200]}")
+                if response.status_code == 200:
+                    try:
+                        data = response.json()
+                    except ValueError as exc:
+                        raise WeatherError(f"{location}: response is not JSON: {response.text[:200]}") from exc
+                    return self.parse(location, data)
+                error = WeatherError(f"{location}: HTTP {response.status_code}")
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.backoff * 2 ** attempt * (1 + random.random() / 2))
+        raise WeatherError(f"{location}: giving up after {self.max_retries + 1} attempts") from error
+
+    # Reading from a decoded response; anything missing or malformed is a WeatherError
+    @staticmethod
+    def parse(location, data):
+        try:
+            rain = data.get("rain") or {}
+            temperature = (data.get("main") or {}).get("temp")
+            return weather_reading(
+                location,
+                cloud_cover=_number(data["clouds"]["all"]),
+                wind_speed=_number(data["wind"]["speed"]),
+                precipitation=_number(rain["1h"]) if "1h" in rain else _number(rain.get("3h", 0.0)) / 3,
+                temperature=None if temperature is None else _number(temperature),
+            )
+        except (KeyError, TypeError, AttributeError) as exc:
+            raise WeatherError(f"{location}: unexpected response {str(data)[:200]}") from exc
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+# Local provider for tests and offline use: fixed readings per location, or a
+# default reading derived deterministically from the location name. Locations in
+# `failing` raise WeatherError, as an unknown city would.
+class StubWeatherProvider:
+    def __init__(self, readings=None, delay=0.0, failing=()):
+        self.readings = readings or {}
+        self.delay = delay
+        self.failing = set(failing)
+        self.calls = 0
+
+    async def fetch(self, location):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if location in self.failing:
+            raise WeatherError(f"No weather for {location}")
+        if location in self.readings:
+            return weather_reading(location, **self.readings[location])
+        rng = random.Random(location)
+        return weather_reading(location, cloud_cover=rng.randint(0, 100), wind_speed=round(rng.uniform(1, 10), 1),
+                               precipitation=round(rng.uniform(0, 10), 1), temperature=round(rng.uniform(15, 35), 1))
+
+    async def close(self):
+        pass
+
+
+# Caching front for a provider. Readings are cached per location for `ttl` seconds,
+# and concurrent requests for the same location share a single in-flight fetch.
+class WeatherClient:
+    def __init__(self, provider=None, ttl=CACHE_TTL_SECONDS):
+        self.provider = provider or OpenWeatherProvider()
+        self.ttl = ttl
+        self.cache = {}  # location -> (expires_at, reading)
+        self.in_flight = {}  # location -> Task
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, location):
+        cached = self.cache.get(location)
+        if cached is not None and cached[0] > time.monotonic():
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        task = self.in_flight.get(location)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(location))
+            self.in_flight[location] = task
+        return await asyncio.shield(task)
+
+    async def _fetch(self, location):
+        try:
+            reading = await self.provider.fetch(location)
+            self.cache[location] = (time.monotonic() + self.ttl, reading)
+            return reading
+        finally:
+            self.in_flight.pop(location, None)
+
+    # Fetch many locations concurrently; failed locations map to their WeatherError
+    async def get_many(self, locations):
+        results = await asyncio.gather(*(self.get(location) for location in locations), return_exceptions=True)
+        return dict(zip(locations, results))
+
+    def invalidate(self, location=None):
+        if location is None:
+            self.cache.clear()
+        else:
+            self.cache.pop(location, None)
+
+    async def close(self):
+        await self.provider.close()
+
+
+def make_provider(name=None):
+    name = name or WEATHER_PROVIDER
+    if name == "stub":
+        return StubWeatherProvider()
+    if name == "openweather":
+        return OpenWeatherProvider()
+    raise ValueError(f"Unknown weather provider: {name}")
+
+
+# Blocking front for synchronous callers such as Streamlit scripts. Streamlit reruns
+# the script on fresh threads, so the WeatherClient (and its pooled connections) lives
+# on one long-running event loop and calls are submitted to it.
+class SyncWeatherClient:
+    def __init__(self, client=None):
+        self.client = client or WeatherClient(make_provider())
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="weather-client", daemon=True)
+        self.thread.start()
+
+    def _run(self, coro, timeout):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def get(self, location, timeout=None):
+        return self._run(self.client.get(location), timeout)
+
+    def get_many(self, locations, timeout=None):
+        return self._run(self.client.get_many(locations), timeout)
+
+    def close(self):
+        self._run(self.client.close(), None)
+        self.loop.call_soon_threadsafe(self.loop.stop)